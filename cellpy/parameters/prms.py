@@ -75,6 +75,8 @@ Reader = {
     "raw_datadir": None,
     "cellpy_datadir": None,
     "auto_dirs": True,  # search in prm-file for res and hdf5 dirs in loadcell
+    "raw_load_workers": 1,  # threads used for loading several raw files (arbin)
+    "csv_export_workers": 1,  # threads used for writing the files in to_csv
 }
 Reader = box.Box(Reader)
 
@@ -154,6 +156,7 @@ Arbin = {
     "detect_subprocess_need": False,
     "sub_process_path": None,
     "office_version": "64bit",
+    "copy_to_temp_dir": None,  # None: copy only files on network drives
 }
 
 # Register pre-defined instruments:
@@ -208,13 +211,16 @@ _cellpyfile_step = "/steps"
 _cellpyfile_summary = "/summary"
 _cellpyfile_fid = "/fid"
 
-_cellpyfile_complevel = 1
-_cellpyfile_complib = None  # currently defaults to "zlib"
+_cellpyfile_complevel = 5
+_cellpyfile_complib = "blosc:zstd"  # None defaults to "zlib"
 _cellpyfile_raw_format = "table"
+_cellpyfile_raw_chunksize = 100_000  # number of rows written pr. batch
 _cellpyfile_summary_format = "table"
 _cellpyfile_stepdata_format = "table"
 _cellpyfile_infotable_format = "fixed"
-_cellpyfile_fidtable_format = "fixed"
+_cellpyfile_fidtable_format = "table"
+_cellpyfile_chunk_cache_size = 64 * 1024 * 1024  # bytes (HDF5 default is 1 MiB)
+_cellpyfile_chunk_cache_nelmts = 10007  # number of slots (should be a prime)
 
 # used as global variables
 _globals_status = ""
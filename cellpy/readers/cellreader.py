@@ -19,8 +19,10 @@ from pathlib import Path
 import logging
 import sys
 import collections
+import concurrent.futures
+import functools
+import importlib
 import warnings
-import csv
 import itertools
 import time
 import copy
@@ -28,7 +30,6 @@ import copy
 import numpy as np
 import pandas as pd
 from pandas.errors import PerformanceWarning
-from scipy import interpolate
 
 from cellpy.parameters import prms
 from cellpy.parameters.legacy import internal_settings as old_settings
@@ -45,18 +46,45 @@ from cellpy.parameters.internal_settings import (
 )
 from cellpy.readers.core import (
     FileID,
+    FileIDTable,
     Cell,
     CELLPY_FILE_VERSION,
     MINIMUM_CELLPY_FILE_VERSION,
     xldate_as_datetime,
     interpolate_y_on_x,
     identify_last_data_point,
+    _stat_file,
 )
 
 HEADERS_NORMAL = get_headers_normal()
 HEADERS_SUMMARY = get_headers_summary()
 HEADERS_STEP_TABLE = get_headers_step_table()
 
+# instrument name -> (loader module, loader class, tester, experimental)
+INSTRUMENTS = {
+    "arbin": ("arbin", "ArbinLoader", "arbin", False),
+    "arbin_res": ("arbin", "ArbinLoader", "arbin", False),
+    "pec": ("pec", "PECLoader", "pec", True),
+    "pec_csv": ("pec", "PECLoader", "pec", True),
+    "biologics": ("biologics_mpr", "MprLoader", "biologic", True),
+    "biologics_mpr": ("biologics_mpr", "MprLoader", "biologic", True),
+    "custom": ("custom", "CustomLoader", "custom", False),
+}
+
+# aliases (lower case) accepted in place of a dataset number
+DATASET_NUMBER_ALIASES = {
+    "last": -1,
+    "end": -1,
+    "newest": -1,
+    "first": 0,
+    "zero": 0,
+    "beginning": 0,
+    "default": 0,
+}
+
+# file extensions (lower case) that are taken to be cellpy-files
+CELLPY_FILE_EXTENSIONS = (".h5", ".hdf5", ".cellpy", ".cpy")
+
 # TODO: @jepe - performance warnings - mixed types within cols (pytables)
 performance_warning_level = "ignore"  # "ignore", "error"
 warnings.filterwarnings(
@@ -103,6 +131,23 @@ class CellpyData(object):
         txt += "\n"
         return txt
 
+    # shared by all instances (not re-created in __init__)
+    list_of_step_types = (
+        "charge",
+        "discharge",
+        "cv_charge",
+        "cv_discharge",
+        "taper_charge",
+        "taper_discharge",
+        "charge_cv",
+        "discharge_cv",
+        "ocvrlx_up",
+        "ocvrlx_down",
+        "ir",
+        "rest",
+        "not_known",
+    )
+
     def __bool__(self):
         if self.cells:
             return True
@@ -149,13 +194,13 @@ class CellpyData(object):
             self.filestatuschecker = filestatuschecker
         self.forced_errors = 0
         self.summary_exists = False
+        self._file_id_cache = {}
+        self.hdf5_cache_size = prms._cellpyfile_chunk_cache_size
 
         if not filenames:
             self.file_names = []
         else:
-            self.file_names = filenames
-            if not self._is_listtype(self.file_names):
-                self.file_names = [self.file_names]
+            self.file_names = self._as_file_list(filenames)
         if not selected_scans:
             self.selected_scans = []
         else:
@@ -170,21 +215,6 @@ class CellpyData(object):
 
         self.capacity_modifiers = ["reset"]
 
-        self.list_of_step_types = [
-            "charge",
-            "discharge",
-            "cv_charge",
-            "cv_discharge",
-            "taper_charge",
-            "taper_discharge",
-            "charge_cv",
-            "discharge_cv",
-            "ocvrlx_up",
-            "ocvrlx_down",
-            "ir",
-            "rest",
-            "not_known",
-        ]
         # - options
         self.force_step_table_creation = prms.Reader.force_step_table_creation
         self.force_all = prms.Reader.force_all
@@ -208,9 +238,9 @@ class CellpyData(object):
         self.auto_dirs = prms.Reader.auto_dirs
 
         # - headers and instruments
-        self.headers_normal = get_headers_normal()
-        self.headers_summary = get_headers_summary()
-        self.headers_step_table = get_headers_step_table()
+        self.headers_normal = HEADERS_NORMAL
+        self.headers_summary = HEADERS_SUMMARY
+        self.headers_step_table = HEADERS_STEP_TABLE
 
         self.table_names = None  # dictionary defined in set_instruments
         self.set_instrument()
@@ -388,38 +418,21 @@ class CellpyData(object):
 
         self.logger.debug(f"Setting instrument: {instrument}")
 
-        if instrument in ["arbin", "arbin_res"]:
-            from cellpy.readers.instruments.arbin import ArbinLoader as RawLoader
-
-            self._set_instrument(RawLoader)
-            self.tester = "arbin"
-
-        elif instrument == "arbin_sql":
+        if instrument == "arbin_sql":
             warnings.warn(f"{instrument} not implemented yet")
             self.tester = "arbin"
+            return
 
-        elif instrument in ["pec", "pec_csv"]:
-            warnings.warn("Experimental! Not ready for production!")
-            from cellpy.readers.instruments.pec import PECLoader as RawLoader
-
-            self._set_instrument(RawLoader)
-            self.tester = "pec"
-
-        elif instrument in ["biologics", "biologics_mpr"]:
-            from cellpy.readers.instruments.biologics_mpr import MprLoader as RawLoader
+        try:
+            module_name, class_name, tester, experimental = INSTRUMENTS[instrument]
+        except (KeyError, TypeError):
+            raise Exception(f"option does not exist: '{instrument}'")
 
+        if experimental:
             warnings.warn("Experimental! Not ready for production!")
-            self._set_instrument(RawLoader)
-            self.tester = "biologic"
-
-        elif instrument == "custom":
-            from cellpy.readers.instruments.custom import CustomLoader as RawLoader
-
-            self._set_instrument(RawLoader)
-            self.tester = "custom"
-
-        else:
-            raise Exception(f"option does not exist: '{instrument}'")
+        module = importlib.import_module(f"cellpy.readers.instruments.{module_name}")
+        self._set_instrument(getattr(module, class_name))
+        self.tester = tester
 
     def _set_instrument(self, loader_class):
         self.loader_class = loader_class()
@@ -473,8 +486,7 @@ class CellpyData(object):
             self.logger.info("No directory name given")
             return
         if not os.path.isdir(directory):
-            self.logger.info(directory)
-            self.logger.info("Directory does not exist")
+            self.logger.info("Directory does not exist: %s", directory)
             return
         self.raw_datadir = directory
 
@@ -498,7 +510,7 @@ class CellpyData(object):
             self.logger.info("No directory name given")
             return
         if not os.path.isdir(directory):
-            self.logger.info("Directory does not exist")
+            self.logger.info("Directory does not exist: %s", directory)
             return
         self.cellpy_datadir = directory
 
@@ -523,12 +535,11 @@ class CellpyData(object):
                 individual raw-file.
             """
 
-        txt = "Checking file ids - using '%s'" % self.filestatuschecker
-        self.logger.info(txt)
+        self.logger.info("Checking file ids - using '%s'", self.filestatuschecker)
 
         ids_cellpy_file = self._check_cellpy_file(cellpyfile)
 
-        self.logger.debug(f"cellpyfile ids: {ids_cellpy_file}")
+        self.logger.debug("cellpyfile ids: %s", ids_cellpy_file)
 
         if not ids_cellpy_file:
             # self.logger.debug("hdf5 file does not exist - needs updating")
@@ -537,11 +548,15 @@ class CellpyData(object):
         ids_raw = self._check_raw(rawfiles)
 
         if detailed:
-            similar = self._parse_ids(ids_raw, ids_cellpy_file)
+            similar = self._parse_ids(
+                ids_raw, ids_cellpy_file, check_on=self.filestatuschecker
+            )
             return similar
 
         else:
-            similar = self._compare_ids(ids_raw, ids_cellpy_file)
+            similar = self._compare_ids(
+                ids_raw, ids_cellpy_file, check_on=self.filestatuschecker
+            )
             if not similar:
                 # self.logger.debug("hdf5 file needs updating")
                 return False
@@ -550,111 +565,75 @@ class CellpyData(object):
                 return True
 
     def _check_raw(self, file_names, abort_on_missing=False):
-        """Get the file-ids for the res_files."""
+        """Get the file-ids for the res_files (as FileIDTable)."""
 
         strip_file_names = True
-        check_on = self.filestatuschecker
-        if not self._is_listtype(file_names):
-            file_names = [file_names]
-
-        ids = dict()
-        for f in file_names:
-            self.logger.debug(f"checking res file {f}")
-            fid = FileID(f)
-            # self.logger.debug(fid)
-            if fid.name is None:
-                warnings.warn(f"file does not exist: {f}")
-                if abort_on_missing:
-                    sys.exit(-1)
-            else:
-                if strip_file_names:
-                    name = os.path.basename(f)
-                else:
-                    name = f
-                if check_on == "size":
-                    ids[name] = int(fid.size)
-                elif check_on == "modified":
-                    ids[name] = int(fid.last_modified)
-                else:
-                    ids[name] = int(fid.last_accessed)
+        file_names = self._as_file_list(file_names)
+
+        self.logger.debug("checking res files %s", file_names)
+        ids = FileIDTable.from_files(file_names, strip_filenames=strip_file_names)
+        for f in ids.missing:
+            warnings.warn(f"file does not exist: {f}")
+            if abort_on_missing:
+                sys.exit(-1)
         return ids
 
     def _check_cellpy_file(self, filename):
-        """Get the file-ids for the cellpy_file."""
+        """Get the file-ids for the cellpy_file (as FileIDTable)."""
 
         strip_filenames = True
         parent_level = prms._cellpyfile_root
         fid_dir = prms._cellpyfile_fid
-        check_on = self.filestatuschecker
         self.logger.debug("checking cellpy-file")
         self.logger.debug(filename)
-        if not os.path.isfile(filename):
+        st = _stat_file(filename)
+        if st is None:
             self.logger.debug("cellpy-file does not exist")
             return None
+        cache_key = (os.path.abspath(filename), st.st_mtime_ns, st.st_size)
+        if cache_key in self._file_id_cache:
+            self.logger.debug("using cached file-ids for cellpy-file")
+            return self._file_id_cache[cache_key]
         try:
-            store = pd.HDFStore(filename)
+            store = self._open_cellpy_file(filename)
         except Exception as e:
             self.logger.debug(f"could not open cellpy-file ({e})")
             return None
         try:
-            fidtable = store.select(parent_level + fid_dir)
+            fid_key = parent_level + fid_dir
+            if store.get_storer(fid_key).is_table:
+                # only read the columns needed for the ids
+                fidtable = store.select(
+                    fid_key, columns=FileIDTable.fidtable_columns
+                )
+            else:
+                fidtable = store.select(fid_key)
         except KeyError:
             self.logger.warning("no fidtable -" " you should update your hdf5-file")
             fidtable = None
         finally:
             store.close()
         if fidtable is not None:
-            raw_data_files, raw_data_files_length = self._convert2fid_list(fidtable)
-            txt = "contains %i res-files" % (len(raw_data_files))
-            self.logger.debug(txt)
-            ids = dict()
-            for fid in raw_data_files:
-                full_name = fid.full_name
-                size = fid.size
-                mod = fid.last_modified
-                self.logger.debug(f"fileID information for: {full_name}")
-                self.logger.debug(f"   modified: {mod}")
-                self.logger.debug(f"   size: {size}")
-
-                if strip_filenames:
-                    name = os.path.basename(full_name)
-                else:
-                    name = full_name
-                if check_on == "size":
-                    ids[name] = int(fid.size)
-                elif check_on == "modified":
-                    ids[name] = int(fid.last_modified)
-                else:
-                    ids[name] = int(fid.last_accessed)
+            ids = FileIDTable.from_fidtable(fidtable, strip_filenames=strip_filenames)
+            self.logger.debug(f"contains {len(ids)} res-files")
+            self.logger.debug(ids)
+            self._file_id_cache[cache_key] = ids
             return ids
         else:
             return None
 
-    @staticmethod
-    def _compare_ids(ids_res, ids_cellpy_file):
-        similar = True
-        l_res = len(ids_res)
-        l_cellpy = len(ids_cellpy_file)
-        if l_res == l_cellpy and l_cellpy > 0:
-            for name, value in list(ids_res.items()):
-                if ids_cellpy_file[name] != value:
-                    similar = False
-        else:
-            similar = False
+    def clear_file_id_cache(self):
+        """Remove the cached file-ids for the cellpy-files."""
+        self._file_id_cache.clear()
 
-        return similar
+    @staticmethod
+    def _compare_ids(ids_res, ids_cellpy_file, check_on="size"):
+        return ids_res.is_similar(ids_cellpy_file, check_on=check_on)
 
     @staticmethod
-    def _parse_ids(ids_raw, ids_cellpy_file):
-        similar = dict()
-        for name in ids_raw:
-            v_cellpy = ids_cellpy_file.get(name, None)
-            v_raw = ids_raw[name]
-            similar[name] = False
-            if v_raw is not None:
-                if v_raw == v_cellpy:
-                    similar[name] = True
-        return similar
+    def _parse_ids(ids_raw, ids_cellpy_file, check_on="size"):
+        similar = ids_raw.matches(ids_cellpy_file, check_on=check_on)
+        return dict(zip(ids_raw.names, similar.tolist()))
 
     def loadcell(
         self,
@@ -846,28 +825,27 @@ class CellpyData(object):
         return self
 
     def dev_update(self, file_names=None, **kwargs):
-        print("NOT FINISHED YET - but close")
+        self.logger.info("NOT FINISHED YET - but close")
         if len(self.cell.raw_data_files) != 1:
             self.logger.warning(
                 "Merged cell. But can only update based on the last file"
             )
-            print(self.cell.raw_data_files)
             for fid in self.cell.raw_data_files:
-                print(fid)
+                self.logger.debug(fid)
         last = self.cell.raw_data_files[0].last_data_point
 
         self.dev_update_from_raw(
             file_names=file_names, data_points=[last, None], **kwargs
         )
-        print("lets try to merge")
+        self.logger.debug("lets try to merge")
         self.cell = self.dev_update_merge()
-        print("now it is time to update the step table")
+        self.logger.debug("now it is time to update the step table")
         self.dev_update_make_steps()
-        print("and finally, lets update the summary")
+        self.logger.debug("and finally, lets update the summary")
         self.dev_update_make_summary()
 
     def dev_update_merge(self):
-        print("NOT FINISHED YET - but very close")
+        self.logger.info("NOT FINISHED YET - but very close")
         number_of_tests = len(self.cells)
         if number_of_tests != 2:
             self.logger.warning(
@@ -891,10 +869,10 @@ class CellpyData(object):
         if not t1.raw.empty:
             t1.raw = t1.raw.iloc[:-1]
             raw2 = pd.concat([t1.raw, t2.raw], ignore_index=True)
-            test.no_cycles = max(raw2[cycle_index_header])
+            test.no_cycles = raw2[cycle_index_header].to_numpy().max().item()
             test.raw = raw2
         else:
-            test.no_cycles = max(t2.raw[cycle_index_header])
+            test.no_cycles = t2.raw[cycle_index_header].to_numpy().max().item()
             test = t2
         self.logger.debug(" -> merged with new dataset")
 
@@ -909,12 +887,12 @@ class CellpyData(object):
         self.cell.steps = merged_steps
 
     def dev_update_make_summary(self, **kwargs):
-        print("NOT FINISHED YET - but not critical")
+        self.logger.info("NOT FINISHED YET - but not critical")
         # Update not implemented yet, running full summary calculations for now.
         # For later:
         # old_summary = self.cell.summary.iloc[:-1]
         cycle_index_header = self.headers_summary.cycle_index
-        from_cycle = self.cell.summary.iloc[-1][cycle_index_header]
+        from_cycle = self.cell.summary[cycle_index_header].iat[-1]
         self.make_summary(from_cycle=from_cycle, **kwargs)
         # For later:
         # (Remark! need to solve how to merge culumated columns)
@@ -926,7 +904,7 @@ class CellpyData(object):
         """This method is under development. Using this to develop updating files
         with only new data.
         """
-        print("NOT FINISHED YET - but very close")
+        self.logger.info("NOT FINISHED YET - but very close")
         if file_names:
             self.file_names = file_names
 
@@ -937,8 +915,7 @@ class CellpyData(object):
             )
             return None
 
-        if not isinstance(self.file_names, (list, tuple)):
-            self.file_names = [file_names]
+        self.file_names = self._as_file_list(self.file_names)
 
         raw_file_loader = self.loader
 
@@ -946,11 +923,10 @@ class CellpyData(object):
         test = None
 
         self.logger.debug("start iterating through file(s)")
-        print(self.file_names)
+        self.logger.debug(self.file_names)
 
         for f in self.file_names:
-            self.logger.debug("loading raw file:")
-            self.logger.debug(f"{f}")
+            self.logger.debug("loading raw file: %s", f)
 
             # get a list of cellpy.readers.core.Cell objects
             test = raw_file_loader(f, data_points=data_points, **kwargs)
@@ -998,8 +974,7 @@ class CellpyData(object):
         if file_names:
             self.file_names = file_names
 
-        if not isinstance(self.file_names, (list, tuple)):
-            self.file_names = [file_names]
+        self.file_names = self._as_file_list(self.file_names)
 
         # file_type = self.tester
         raw_file_loader = self.loader
@@ -1007,14 +982,12 @@ class CellpyData(object):
         # so set_number is hard-coded to 0, i.e. actual-test is always test[0]
         set_number = 0
         test = None
+        tests_to_merge = []
         counter = 0
         self.logger.debug("start iterating through file(s)")
 
-        for f in self.file_names:
-            self.logger.debug("loading raw file:")
-            self.logger.debug(f"{f}")
-            new_tests = raw_file_loader(f, **kwargs)
-
+        loaded = self._load_raw_files(raw_file_loader, self.file_names, **kwargs)
+        for f, new_tests in zip(self.file_names, loaded):
             if new_tests:
 
                 # retrieving the first cell data (e.g. first file)
@@ -1025,16 +998,15 @@ class CellpyData(object):
                     else:
                         test = new_tests
 
-                # appending cell data file to existing
+                # collecting cell data to append to existing (merged after
+                # all the files are loaded)
                 else:
                     self.logger.debug("continuing reading files...")
-                    _test = self._append(test[set_number], new_tests[set_number])
-
-                    if not _test:
+                    if new_tests[set_number].no_data:
                         self.logger.warning(f"EMPTY TEST: {f}")
                         continue
 
-                    test[set_number] = _test
+                    tests_to_merge.append(new_tests[set_number])
 
                     # retrieving file info in a for-loop in case of multiple files
                     # Remark!
@@ -1061,6 +1033,9 @@ class CellpyData(object):
 
         self.logger.debug("finished loading the raw-files")
 
+        if tests_to_merge:
+            test[set_number] = self._append_many(test[set_number], tests_to_merge)
+
         test_exists = False
         if test:
             if test[0].no_data:
@@ -1083,6 +1058,28 @@ class CellpyData(object):
         self._invent_a_name()
         return self
 
+    def _load_raw_files(self, raw_file_loader, file_names, **kwargs):
+        """Returns the loaded tests for each file (in the order of file_names).
+
+        The files are loaded one by one unless prms.Reader.raw_load_workers
+        is larger than one; then a thread pool is used so that copying and
+        reading the files can overlap.
+        """
+        workers = min(prms.Reader.raw_load_workers or 1, len(file_names))
+        if workers <= 1:
+            for f in file_names:
+                self.logger.debug("loading raw file: %s", f)
+                yield raw_file_loader(f, **kwargs)
+            return
+
+        self.logger.debug(
+            "loading %i raw files using %i threads", len(file_names), workers
+        )
+        load = functools.partial(raw_file_loader, **kwargs)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            loaded = list(executor.map(load, file_names))
+        yield from loaded
+
     def from_res(self, filenames=None, check_file_type=True):
         """Convenience function for loading arbin-type data into the
         datastructure.
@@ -1104,13 +1101,10 @@ class CellpyData(object):
         # find not-complete datasets, datasets with missing prms etc
         v = []
         if level == 0:
-            for test in self.cells:
-                # check that it contains all the necessary headers
-                # (and add missing ones)
-                # test = self._clean_up_normal_table(test)
-                # check that the test is not empty
-                v.append(self._is_not_empty_dataset(test))
-            self.logger.debug(f"validation array: {v}")
+            # check that the datasets are not empty (an empty dataset is None,
+            # see _empty_dataset)
+            v = [test is not None for test in self.cells]
+            self.logger.debug("validation array: %s", v)
         return v
 
     def check(self):
@@ -1123,12 +1117,9 @@ class CellpyData(object):
             return True
         return False
 
-    # TODO: maybe consider being a bit more concice (re-implement)
-    def _is_not_empty_dataset(self, dataset):
-        if dataset is self._empty_dataset():
-            return False
-        else:
-            return True
+    @staticmethod
+    def _is_not_empty_dataset(dataset):
+        return dataset is not None
 
     # TODO: check if this is useful and if it is rename, if not delete
     def _clean_up_normal_table(self, test=None, dataset_number=None):
@@ -1186,8 +1177,7 @@ class CellpyData(object):
         """
 
         try:
-            self.logger.debug("loading cellpy-file (hdf5):")
-            self.logger.debug(cellpy_file)
+            self.logger.debug("loading cellpy-file (hdf5): %s", cellpy_file)
             new_datasets = self._dev_load_hdf5(cellpy_file, parent_level, accept_old)
             self.logger.debug("cellpy-file loaded")
         except AttributeError:
@@ -1202,8 +1192,7 @@ class CellpyData(object):
                 self.cells.append(dataset)
         else:
             # raise LoadError
-            self.logger.warning("Could not load")
-            self.logger.warning(str(cellpy_file))
+            self.logger.warning("Could not load %s", cellpy_file)
 
         self.number_of_datasets = len(self.cells)
         self.status_datasets = self._validate_datasets()
@@ -1226,8 +1215,7 @@ class CellpyData(object):
         """
 
         try:
-            self.logger.debug("loading cellpy-file (hdf5):")
-            self.logger.debug(cellpy_file)
+            self.logger.debug("loading cellpy-file (hdf5): %s", cellpy_file)
             new_datasets = self._load_hdf5(cellpy_file, parent_level, accept_old)
             self.logger.debug("cellpy-file loaded")
         except AttributeError:
@@ -1242,8 +1230,7 @@ class CellpyData(object):
                 self.cells.append(dataset)
         else:
             # raise LoadError
-            self.logger.warning("Could not load")
-            self.logger.warning(str(cellpy_file))
+            self.logger.warning("Could not load %s", cellpy_file)
 
         self.number_of_datasets = len(self.cells)
         self.status_datasets = self._validate_datasets()
@@ -1251,17 +1238,25 @@ class CellpyData(object):
         if return_cls:
             return self
 
-    def _get_cellpy_file_version(self, filename, meta_dir="/info", parent_level=None):
+    def _open_cellpy_file(self, filename):
+        """Open the cellpy-file for reading (using a larger HDF5 chunk cache)."""
+        return pd.HDFStore(
+            filename,
+            mode="r",
+            chunk_cache_size=self.hdf5_cache_size,
+            chunk_cache_nelmts=prms._cellpyfile_chunk_cache_nelmts,
+        )
+
+    def _get_cellpy_file_version(self, store, meta_dir="/info", parent_level=None):
         if parent_level is None:
             parent_level = prms._cellpyfile_root
 
-        with pd.HDFStore(filename) as store:
-            try:
-                meta_table = store.select(parent_level + meta_dir)
-            except KeyError:
-                raise WrongFileVersion(
-                    "This file is VERY old - cannot read file version number"
-                )
+        try:
+            meta_table = store.select(parent_level + meta_dir)
+        except KeyError:
+            raise WrongFileVersion(
+                "This file is VERY old - cannot read file version number"
+            )
         try:
             cellpy_file_version = self._extract_from_dict(
                 meta_table, "cellpy_file_version"
@@ -1300,36 +1295,38 @@ class CellpyData(object):
             self.logger.info(f"File does not exist: {filename}")
             raise IOError(f"File does not exist: {filename}")
 
-        cellpy_file_version = self._get_cellpy_file_version(filename)
+        # one read-only handle for both the version check and the selects
+        with self._open_cellpy_file(filename) as store:
+            cellpy_file_version = self._get_cellpy_file_version(store)
 
-        if cellpy_file_version > CELLPY_FILE_VERSION:
-            raise WrongFileVersion(
-                f"File format too new: {filename} :: version: {cellpy_file_version}"
-                f"Reload from raw or upgrade your cellpy!"
-            )
-
-        elif cellpy_file_version < MINIMUM_CELLPY_FILE_VERSION:
-            raise WrongFileVersion(
-                f"File format too old: {filename} :: version: {cellpy_file_version}"
-                f"Reload from raw or downgrade your cellpy!"
-            )
+            if cellpy_file_version > CELLPY_FILE_VERSION:
+                raise WrongFileVersion(
+                    f"File format too new: {filename} :: version: {cellpy_file_version}"
+                    f"Reload from raw or upgrade your cellpy!"
+                )
 
-        elif cellpy_file_version < CELLPY_FILE_VERSION:
-            if accept_old:
-                self.logger.debug(f"old cellpy file version {cellpy_file_version}")
-                self.logger.debug(f"filename: {filename}")
-                self.logger.warning(f"Loading old file-type. It is recommended that you remake the step table and the "
-                                 f"summary table.")
-                new_data = self._load_old_hdf5(filename, cellpy_file_version)
-            else:
+            elif cellpy_file_version < MINIMUM_CELLPY_FILE_VERSION:
                 raise WrongFileVersion(
                     f"File format too old: {filename} :: version: {cellpy_file_version}"
-                    f"Try loading setting accept_old=True"
+                    f"Reload from raw or downgrade your cellpy!"
                 )
 
-        else:
-            self.logger.debug(f"Loading {filename} :: v{cellpy_file_version}")
-            new_data = self._load_hdf5_current_version(filename)
+            elif cellpy_file_version < CELLPY_FILE_VERSION:
+                if accept_old:
+                    self.logger.debug(f"old cellpy file version {cellpy_file_version}")
+                    self.logger.debug(f"filename: {filename}")
+                    self.logger.warning(f"Loading old file-type. It is recommended that you remake the step table and the "
+                                     f"summary table.")
+                    new_data = self._load_old_hdf5(filename, cellpy_file_version, store)
+                else:
+                    raise WrongFileVersion(
+                        f"File format too old: {filename} :: version: {cellpy_file_version}"
+                        f"Try loading setting accept_old=True"
+                    )
+
+            else:
+                self.logger.debug(f"Loading {filename} :: v{cellpy_file_version}")
+                new_data = self._load_hdf5_current_version(filename, store)
 
         return new_data
 
@@ -1358,38 +1355,42 @@ class CellpyData(object):
             self.logger.info(f"File does not exist: {filename}")
             raise IOError(f"File does not exist: {filename}")
 
-        cellpy_file_version = self._get_cellpy_file_version(filename)
-
-        if cellpy_file_version > CELLPY_FILE_VERSION:
-            raise WrongFileVersion(
-                f"File format too new: {filename} :: version: {cellpy_file_version}"
-                f"Reload from raw or upgrade your cellpy!"
-            )
+        # one read-only handle for both the version check and the selects
+        with self._open_cellpy_file(filename) as store:
+            cellpy_file_version = self._get_cellpy_file_version(store)
 
-        elif cellpy_file_version < MINIMUM_CELLPY_FILE_VERSION:
-            raise WrongFileVersion(
-                f"File format too old: {filename} :: version: {cellpy_file_version}"
-                f"Reload from raw or downgrade your cellpy!"
-            )
+            if cellpy_file_version > CELLPY_FILE_VERSION:
+                raise WrongFileVersion(
+                    f"File format too new: {filename} :: version: {cellpy_file_version}"
+                    f"Reload from raw or upgrade your cellpy!"
+                )
 
-        elif cellpy_file_version < CELLPY_FILE_VERSION:
-            if accept_old:
-                self.logger.debug(f"old cellpy file version {cellpy_file_version}")
-                self.logger.debug(f"filename: {filename}")
-                new_data = self._load_old_hdf5(filename, cellpy_file_version)
-            else:
+            elif cellpy_file_version < MINIMUM_CELLPY_FILE_VERSION:
                 raise WrongFileVersion(
                     f"File format too old: {filename} :: version: {cellpy_file_version}"
-                    f"Try loading setting accept_old=True"
+                    f"Reload from raw or downgrade your cellpy!"
                 )
 
-        else:
-            self.logger.debug(f"Loading {filename} :: v{cellpy_file_version}")
-            new_data = self._load_hdf5_current_version(filename)
+            elif cellpy_file_version < CELLPY_FILE_VERSION:
+                if accept_old:
+                    self.logger.debug(f"old cellpy file version {cellpy_file_version}")
+                    self.logger.debug(f"filename: {filename}")
+                    new_data = self._load_old_hdf5(filename, cellpy_file_version, store)
+                else:
+                    raise WrongFileVersion(
+                        f"File format too old: {filename} :: version: {cellpy_file_version}"
+                        f"Try loading setting accept_old=True"
+                    )
+
+            else:
+                self.logger.debug(f"Loading {filename} :: v{cellpy_file_version}")
+                new_data = self._load_hdf5_current_version(filename, store)
 
         return new_data
 
-    def _load_hdf5_current_version(self, filename, meta_dir="/info", parent_level=None):
+    def _load_hdf5_current_version(
+        self, filename, store, meta_dir="/info", parent_level=None
+    ):
         if parent_level is None:
             parent_level = prms._cellpyfile_root
 
@@ -1398,21 +1399,18 @@ class CellpyData(object):
         summary_dir = prms._cellpyfile_summary
         fid_dir = prms._cellpyfile_fid
 
-        with pd.HDFStore(filename) as store:
-            data, meta_table = self._create_initial_data_set_from_cellpy_file(
-                meta_dir, parent_level, store
-            )
-            self._check_keys_in_cellpy_file(
-                meta_dir, parent_level, raw_dir, store, summary_dir
-            )
-            self._extract_summary_from_cellpy_file(
-                data, parent_level, store, summary_dir
-            )
-            self._extract_raw_from_cellpy_file(data, parent_level, raw_dir, store)
-            self._extract_steps_from_cellpy_file(data, parent_level, step_dir, store)
-            fid_table, fid_table_selected = self._extract_fids_from_cellpy_file(
-                fid_dir, parent_level, store
-            )
+        data, meta_table = self._create_initial_data_set_from_cellpy_file(
+            meta_dir, parent_level, store
+        )
+        self._check_keys_in_cellpy_file(
+            meta_dir, parent_level, raw_dir, store, summary_dir
+        )
+        self._extract_summary_from_cellpy_file(data, parent_level, store, summary_dir)
+        self._extract_raw_from_cellpy_file(data, parent_level, raw_dir, store)
+        self._extract_steps_from_cellpy_file(data, parent_level, step_dir, store)
+        fid_table, fid_table_selected = self._extract_fids_from_cellpy_file(
+            fid_dir, parent_level, store
+        )
 
         self._extract_meta_from_cellpy_file(data, meta_table, filename)
 
@@ -1430,7 +1428,7 @@ class CellpyData(object):
         ]  # but cellpy is ready when that time comes (if it ever happens)
         return new_tests
 
-    def _load_hdf5_v5(self, filename):
+    def _load_hdf5_v5(self, filename, store):
         parent_level = "CellpyData"
         raw_dir = "/raw"
         step_dir = "/steps"
@@ -1438,21 +1436,18 @@ class CellpyData(object):
         fid_dir = "/fid"
         meta_dir = "/info"
 
-        with pd.HDFStore(filename) as store:
-            data, meta_table = self._create_initial_data_set_from_cellpy_file(
-                meta_dir, parent_level, store
-            )
-            self._check_keys_in_cellpy_file(
-                meta_dir, parent_level, raw_dir, store, summary_dir
-            )
-            self._extract_summary_from_cellpy_file(
-                data, parent_level, store, summary_dir
-            )
-            self._extract_raw_from_cellpy_file(data, parent_level, raw_dir, store)
-            self._extract_steps_from_cellpy_file(data, parent_level, step_dir, store)
-            fid_table, fid_table_selected = self._extract_fids_from_cellpy_file(
-                fid_dir, parent_level, store
-            )
+        data, meta_table = self._create_initial_data_set_from_cellpy_file(
+            meta_dir, parent_level, store
+        )
+        self._check_keys_in_cellpy_file(
+            meta_dir, parent_level, raw_dir, store, summary_dir
+        )
+        self._extract_summary_from_cellpy_file(data, parent_level, store, summary_dir)
+        self._extract_raw_from_cellpy_file(data, parent_level, raw_dir, store)
+        self._extract_steps_from_cellpy_file(data, parent_level, step_dir, store)
+        fid_table, fid_table_selected = self._extract_fids_from_cellpy_file(
+            fid_dir, parent_level, store
+        )
 
         self._extract_meta_from_cellpy_file(data, meta_table, filename)
 
@@ -1471,11 +1466,11 @@ class CellpyData(object):
         ]  # but cellpy is ready when that time comes (if it ever happens)
         return new_tests
 
-    def _load_old_hdf5(self, filename, cellpy_file_version):
+    def _load_old_hdf5(self, filename, cellpy_file_version, store):
         if cellpy_file_version < 5:
-            new_data = self._load_old_hdf5_v3_to_v4(filename)
+            new_data = self._load_old_hdf5_v3_to_v4(filename, store)
         elif cellpy_file_version == 5:
-            new_data = self._load_hdf5_v5(filename)
+            new_data = self._load_hdf5_v5(filename, store)
         else:
             raise WrongFileVersion(f"version {cellpy_file_version} is not supported")
 
@@ -1485,7 +1480,7 @@ class CellpyData(object):
 
         return new_data
 
-    def _load_old_hdf5_v3_to_v4(self, filename):
+    def _load_old_hdf5_v3_to_v4(self, filename, store):
         parent_level = "CellpyData"
         meta_dir = "/info"
         _raw_dir = "/dfdata"
@@ -1493,11 +1488,9 @@ class CellpyData(object):
         _summary_dir = "/dfsummary"
         _fid_dir = "/fidtable"
 
-        with pd.HDFStore(filename) as store:
-            data, meta_table = self._create_initial_data_set_from_cellpy_file(
-                meta_dir, parent_level, store
-            )
-
+        data, meta_table = self._create_initial_data_set_from_cellpy_file(
+            meta_dir, parent_level, store
+        )
         self._check_keys_in_cellpy_file(
             meta_dir, parent_level, _raw_dir, store, _summary_dir
         )
@@ -1556,8 +1549,10 @@ class CellpyData(object):
     ):
         required_keys = [raw_dir, summary_dir, meta_dir]
         required_keys = ["/" + parent_level + _ for _ in required_keys]
+        # store.keys() walks the whole node tree, so only list it once
+        keys_in_store = set(store.keys())
         for key in required_keys:
-            if key not in store.keys():
+            if key not in keys_in_store:
                 self.logger.info(
                     f"This cellpy-file is not good enough - "
                     f"at least one key is missing: {key}"
@@ -1565,7 +1560,7 @@ class CellpyData(object):
                 raise Exception(
                     f"OH MY GOD! At least one crucial key is missing {key}!"
                 )
-        self.logger.debug(f"Keys in current cellpy-file: {store.keys()}")
+        self.logger.debug("Keys in current cellpy-file: %s", keys_in_store)
 
     @staticmethod
     def _extract_raw_from_cellpy_file(data, parent_level, raw_dir, store):
@@ -1600,14 +1595,12 @@ class CellpyData(object):
             warnings.warn(f"Unhandled exception raised: {e}")
 
     def _extract_meta_from_cellpy_file(self, data, meta_table, filename):
-        # get attributes from meta table
-        # remark! could also utilise the pandas to dictionary method directly
-        # for example: meta_table.T.to_dict()
-        # Maybe a good task for someone who would like to learn more about
-        # how cellpy works..
+        # get attributes from meta table (the meta table has only one row,
+        # so we pick it out once instead of indexing the table per attribute)
+        meta = self._meta_table_as_dict(meta_table)
 
         for attribute in ATTRS_CELLPYFILE:
-            value = self._extract_from_dict(meta_table, attribute)
+            value = meta.get(attribute)
             # some fixes due to errors propagated into the cellpy-files
             if attribute == "creator":
                 if not isinstance(value, str):
@@ -1627,32 +1620,33 @@ class CellpyData(object):
         data.loaded_from = str(filename)
 
         # hack to allow the renaming of tests to datasets
-        try:
-            name = self._extract_from_dict_hard(meta_table, "name")
+        if "name" in meta:
+            name = meta["name"]
             if not isinstance(name, str):
                 name = "no_name"
             data.name = name
 
-        except KeyError:
-            self.logger.debug(f"missing key in meta table: {name}")
-            print(meta_table)
+        else:
+            self.logger.debug("missing key in meta table: name")
+            self.logger.debug(meta_table)
             warnings.warn("OLD-TYPE: Recommend to save in new format!")
-            try:
-                name = self._extract_from_dict(meta_table, "test_name")
-            except Exception as e:
-                name = "no_name"
-                self.logger.debug("name set to 'no_name")
-                warnings.warn(f"Unhandled exception raised: {e}")
-            data.name = name
+            data.name = meta.get("test_name", "no_name")
 
         # unpacking the raw data limits
         for key in data.raw_limits:
-            try:
-                data.raw_limits[key] = self._extract_from_dict_hard(meta_table, key)
-            except KeyError:
+            if key in meta:
+                data.raw_limits[key] = meta[key]
+            else:
                 self.logger.debug(f"missing key in meta_table: {key}")
                 warnings.warn("OLD-TYPE: Recommend to save in new format!")
 
+    @staticmethod
+    def _meta_table_as_dict(meta_table):
+        """Returns the (single) row of the meta table as a dictionary."""
+        if meta_table is None or meta_table.empty:
+            return {}
+        return meta_table.iloc[0].to_dict()
+
     @staticmethod
     def _extract_from_dict(t, x, default_value=None):
         try:
@@ -1680,47 +1674,47 @@ class CellpyData(object):
 
         test = self.get_cell(dataset_number)
 
-        infotable = collections.OrderedDict()
-
-        for attribute in ATTRS_CELLPYFILE:
-            value = getattr(test, attribute)
-            infotable[attribute] = [value]
-
-        infotable["cellpy_file_version"] = [CELLPY_FILE_VERSION]
-
-        limits = test.raw_limits
-        for key in limits:
-            infotable[key] = limits[key]
+        # one record (row) with the attributes and the limits
+        infotable = {
+            attribute: getattr(test, attribute) for attribute in ATTRS_CELLPYFILE
+        }
+        infotable["cellpy_file_version"] = CELLPY_FILE_VERSION
+        infotable.update(test.raw_limits)
 
-        infotable = pd.DataFrame(infotable)
+        infotable = pd.DataFrame([infotable])
 
         self.logger.debug("_create_infotable: fid")
-        fidtable = collections.OrderedDict()
-        fidtable["raw_data_name"] = []
-        fidtable["raw_data_full_name"] = []
-        fidtable["raw_data_size"] = []
-        fidtable["raw_data_last_modified"] = []
-        fidtable["raw_data_last_accessed"] = []
-        fidtable["raw_data_last_info_changed"] = []
-        fidtable["raw_data_location"] = []
-        fidtable["raw_data_files_length"] = []
-        fidtable["last_data_point"] = []
+        fidtable_columns = [
+            "raw_data_name",
+            "raw_data_full_name",
+            "raw_data_size",
+            "raw_data_last_modified",
+            "raw_data_last_accessed",
+            "raw_data_last_info_changed",
+            "raw_data_location",
+            "raw_data_files_length",
+            "last_data_point",
+            "raw_data_fid",
+        ]
         fids = test.raw_data_files
-        fidtable["raw_data_fid"] = fids
-        if fids:
-            for fid, length in zip(fids, test.raw_data_files_length):
-                fidtable["raw_data_name"].append(fid.name)
-                fidtable["raw_data_full_name"].append(fid.full_name)
-                fidtable["raw_data_size"].append(fid.size)
-                fidtable["raw_data_last_modified"].append(fid.last_modified)
-                fidtable["raw_data_last_accessed"].append(fid.last_accessed)
-                fidtable["raw_data_last_info_changed"].append(fid.last_info_changed)
-                fidtable["raw_data_location"].append(fid.location)
-                fidtable["raw_data_files_length"].append(length)
-                fidtable["last_data_point"].append(fid.last_data_point)
-        else:
+        if not fids:
             warnings.warn("seems you lost info about your raw-data (missing fids)")
-        fidtable = pd.DataFrame(fidtable)
+        rows = [
+            (
+                fid.name,
+                fid.full_name,
+                fid.size,
+                fid.last_modified,
+                fid.last_accessed,
+                fid.last_info_changed,
+                fid.location,
+                length,
+                fid.last_data_point,
+                fid,
+            )
+            for fid, length in zip(fids, test.raw_data_files_length)
+        ]
+        fidtable = pd.DataFrame.from_records(rows, columns=fidtable_columns)
         return infotable, fidtable
 
     def _convert2fid_list(self, tbl):
@@ -1728,20 +1722,42 @@ class CellpyData(object):
         fids = []
         lengths = []
         min_amount = 0
-        for counter, item in enumerate(tbl["raw_data_name"]):
+        # pulling out each column once instead of indexing them for each row
+        if "last_data_point" in tbl.columns:
+            last_data_points = tbl["last_data_point"].values
+        else:
+            last_data_points = [0] * len(tbl)
+        columns = zip(
+            tbl["raw_data_name"].values,
+            tbl["raw_data_full_name"].values,
+            tbl["raw_data_size"].values,
+            tbl["raw_data_last_modified"].values,
+            tbl["raw_data_last_accessed"].values,
+            tbl["raw_data_last_info_changed"].values,
+            tbl["raw_data_location"].values,
+            tbl["raw_data_files_length"].values,
+            last_data_points,
+        )
+        for (
+            name,
+            full_name,
+            size,
+            last_modified,
+            last_accessed,
+            last_info_changed,
+            location,
+            length,
+            last_data_point,
+        ) in columns:
             fid = FileID()
-            fid.name = item
-            fid.full_name = tbl["raw_data_full_name"][counter]
-            fid.size = tbl["raw_data_size"][counter]
-            fid.last_modified = tbl["raw_data_last_modified"][counter]
-            fid.last_accessed = tbl["raw_data_last_accessed"][counter]
-            fid.last_info_changed = tbl["raw_data_last_info_changed"][counter]
-            fid.location = tbl["raw_data_location"][counter]
-            length = tbl["raw_data_files_length"][counter]
-            if "last_data_point" in tbl.columns:
-                fid.last_data_point = tbl["last_data_point"][counter]
-            else:
-                fid.last_data_point = 0
+            fid.name = name
+            fid.full_name = full_name
+            fid.size = size
+            fid.last_modified = last_modified
+            fid.last_accessed = last_accessed
+            fid.last_info_changed = last_info_changed
+            fid.location = location
+            fid.last_data_point = last_data_point
             fids.append(fid)
             lengths.append(length)
             min_amount = 1
@@ -1762,28 +1778,118 @@ class CellpyData(object):
         else:
             if datasets is None:
                 datasets = list(range(len(self.cells)))
-            first = True
-            for dataset_number in datasets:
-                if first:
-                    dataset = self.cells[dataset_number]
-                    first = False
-                else:
-                    dataset = self._append(dataset, self.cells[dataset_number])
-                    for raw_data_file, file_size in zip(
-                        self.cells[dataset_number].raw_data_files,
-                        self.cells[dataset_number].raw_data_files_length,
-                    ):
-                        dataset.raw_data_files.append(raw_data_file)
-                        dataset.raw_data_files_length.append(file_size)
+            first_number, *other_numbers = datasets
+            others = [self.cells[dataset_number] for dataset_number in other_numbers]
+            # merging all the datasets in one go (concatenating only once)
+            dataset = self._append_many(self.cells[first_number], others)
+            for other in others:
+                dataset.raw_data_files.extend(other.raw_data_files)
+                dataset.raw_data_files_length.extend(other.raw_data_files_length)
             self.cells = [dataset]
             self.number_of_datasets = 1
         return self
 
+    @staticmethod
+    def _shift_column(df, column, value):
+        # adds value to the column, in place on the underlying array when
+        # the result fits in the current dtype (no temporary column needed)
+        values = df[column].to_numpy()
+        if values.flags.writeable and np.result_type(values, value) == values.dtype:
+            np.add(values, value, out=values)
+        else:
+            df[column] = df[column] + value
+
+    def _append_many(self, t1, cells):
+        """Merge several datasets into t1, concatenating the data only once.
+
+        Gives the same result as calling _append for each of the cells in
+        turn, but without copying all the previously merged rows for each
+        new cell. Falls back to _append if step tables are involved or if the
+        summaries do not have the same columns.
+        """
+
+        summary_columns = list(t1.summary.columns)
+        if (
+            t1.raw.empty
+            or t1.steps_made
+            or any(
+                cell.steps_made or list(cell.summary.columns) != summary_columns
+                for cell in cells
+                if not cell.raw.empty
+            )
+        ):
+            for cell in cells:
+                # (empty cells are skipped, so that t1 is only marked as
+                # merged if something was appended)
+                if not cell.raw.empty:
+                    t1 = self._append(t1, cell)
+            return t1
+
+        self.logger.debug(f"merging {len(cells) + 1} datasets")
+        # (the raw data of the cells are shifted in place below)
+        for cell in [t1, *cells]:
+            cell.reset_cache()
+        data_point_header = self.headers_normal.data_point_txt
+        cycle_index_header = self.headers_normal.cycle_index_txt
+        test_time_header = self.headers_normal.test_time_txt
+        self_made_summary = cycle_index_header in summary_columns
+
+        last_data_point = t1.raw[data_point_header].max()
+        last_cycle = t1.raw[cycle_index_header].max()
+        if self_made_summary:
+            last_summary_cycle = t1.summary[cycle_index_header].to_numpy().max()
+        start_time_1 = xldate_as_datetime(t1.start_datetime)
+
+        raws = [t1.raw]
+        summaries = [t1.summary]
+        for cell in cells:
+            if cell.raw.empty:
+                self.logger.debug("the dataset was empty - skipping it")
+                continue
+            diff_time = xldate_as_datetime(cell.start_datetime) - start_time_1
+            diff_time = diff_time.total_seconds()
+            if diff_time < 0:
+                self.logger.warning("Wow! your new dataset is older than the old!")
+
+            self._shift_column(cell.raw, data_point_header, last_data_point)
+            self._shift_column(cell.raw, cycle_index_header, last_cycle)
+            self._shift_column(cell.raw, test_time_header, diff_time)
+
+            if self_made_summary:
+                self._shift_column(
+                    cell.summary, cycle_index_header, last_summary_cycle
+                )
+                self._shift_column(cell.summary, test_time_header, diff_time)
+                last_summary_cycle = max(
+                    last_summary_cycle,
+                    cell.summary[cycle_index_header].to_numpy().max(),
+                )
+            else:
+                self._shift_column(cell.summary, data_point_header, last_data_point)
+
+            last_data_point = max(last_data_point, cell.raw[data_point_header].max())
+            last_cycle = max(last_cycle, cell.raw[cycle_index_header].max())
+            raws.append(cell.raw)
+            summaries.append(cell.summary)
+
+        if len(raws) > 1:
+            t1.raw = pd.concat(raws, ignore_index=True, copy=False)
+            t1.summary = pd.concat(summaries, ignore_index=True, copy=False)
+            t1.no_cycles = last_cycle.item()
+            t1.merged = True
+            self.logger.debug(" -> merged with new datasets")
+        else:
+            self.logger.debug(" -> nothing to merge (the new datasets were empty)")
+        return t1
+
     def _append(self, t1, t2, merge_summary=True, merge_step_table=True):
         self.logger.debug(
             f"merging two datasets (merge summary = {merge_summary}) "
             f"(merge step table = {merge_step_table})"
         )
+        # (the raw data and steps of t2 are shifted in place below)
+        t1.reset_cache()
+        t2.reset_cache()
 
         if t1.raw.empty:
             self.logger.debug("OBS! the first dataset is empty")
@@ -1808,24 +1914,24 @@ class CellpyData(object):
         # mod data points for set 2
         data_point_header = self.headers_normal.data_point_txt
         try:
-            last_data_point = max(t1.raw[data_point_header])
+            last_data_point = t1.raw[data_point_header].to_numpy().max()
         except ValueError:
             last_data_point = 0
 
-        t2.raw[data_point_header] = t2.raw[data_point_header] + last_data_point
+        self._shift_column(t2.raw, data_point_header, last_data_point)
         # mod cycle index for set 2
         cycle_index_header = self.headers_normal.cycle_index_txt
         try:
-            last_cycle = max(t1.raw[cycle_index_header])
+            last_cycle = t1.raw[cycle_index_header].to_numpy().max()
         except ValueError:
             last_cycle = 0
-        t2.raw[cycle_index_header] = t2.raw[cycle_index_header] + last_cycle
+        self._shift_column(t2.raw, cycle_index_header, last_cycle)
         # mod test time for set 2
         test_time_header = self.headers_normal.test_time_txt
-        t2.raw[test_time_header] = t2.raw[test_time_header] + diff_time
+        self._shift_column(t2.raw, test_time_header, diff_time)
         # merging
         if not t1.raw.empty:
-            raw2 = pd.concat([t1.raw, t2.raw], ignore_index=True)
+            raw2 = pd.concat([t1.raw, t2.raw], ignore_index=True, copy=False)
 
             # checking if we already have made a summary file of these datasets
             # (to be used if merging summaries (but not properly implemented yet))
@@ -1842,34 +1948,25 @@ class CellpyData(object):
 
             if merge_summary:
                 # check if (self-made) summary exists.
-                self_made_summary = True
-                try:
-                    test_it = t1.summary[cycle_index_header]
-                except KeyError as e:
-                    self_made_summary = False
-                try:
-                    test_it = t2.summary[cycle_index_header]
-                except KeyError as e:
-                    self_made_summary = False
+                self_made_summary = (
+                    cycle_index_header in t1.summary.columns
+                    and cycle_index_header in t2.summary.columns
+                )
 
                 if self_made_summary:
                     # mod cycle index for set 2
-                    last_cycle = max(t1.summary[cycle_index_header])
-                    t2.summary[cycle_index_header] = (
-                        t2.summary[cycle_index_header] + last_cycle
-                    )
+                    last_cycle = t1.summary[cycle_index_header].to_numpy().max()
+                    self._shift_column(t2.summary, cycle_index_header, last_cycle)
                     # mod test time for set 2
-                    t2.summary[test_time_header] = (
-                        t2.summary[test_time_header] + diff_time
-                    )
+                    self._shift_column(t2.summary, test_time_header, diff_time)
                     # to-do: mod all the cumsum stuff in the summary (best to make
                     # summary after merging) merging
                 else:
-                    t2.summary[data_point_header] = (
-                        t2.summary[data_point_header] + last_data_point
-                    )
+                    self._shift_column(t2.summary, data_point_header, last_data_point)
 
-                summary2 = pd.concat([t1.summary, t2.summary], ignore_index=True)
+                summary2 = pd.concat(
+                    [t1.summary, t2.summary], ignore_index=True, copy=False
+                )
 
                 test.summary = summary2
 
@@ -1889,10 +1986,10 @@ class CellpyData(object):
                         "create them first!"
                     )
 
-            test.no_cycles = max(raw2[cycle_index_header])
+            test.no_cycles = raw2[cycle_index_header].to_numpy().max().item()
             test.raw = raw2
         else:
-            test.no_cycles = max(t2.raw[cycle_index_header])
+            test.no_cycles = t2.raw[cycle_index_header].to_numpy().max().item()
             test = t2
         test.merged = True
         self.logger.debug(" -> merged with new dataset")
@@ -1905,7 +2002,8 @@ class CellpyData(object):
         # Returns dataset_number (or None if empty)
         # Remark! _is_not_empty_dataset returns True or False
 
-        if not len(self.cells):
+        cells = self.cells
+        if not cells:
             self.logger.info(
                 "Can't see any datasets! Are you sure you have " "loaded anything?"
             )
@@ -1914,19 +2012,11 @@ class CellpyData(object):
         if n is not None:
             v = n
         else:
-            if self.selected_cell_number is None:
-                v = 0
-            else:
-                v = self.selected_cell_number
+            v = self.selected_cell_number or 0
 
-        if check_for_empty:
-            not_empty = self._is_not_empty_dataset(self.cells[v])
-            if not_empty:
-                return v
-            else:
-                return None
-        else:
-            return v
+        if check_for_empty and not self._is_not_empty_dataset(cells[v]):
+            return None
+        return v
 
     # TODO: check if this can be moved to helpers
     def _validate_step_table(self, dataset_number=None, simple=False):
@@ -1943,16 +2033,21 @@ class CellpyData(object):
         if not self.cells[dataset_number].steps_made:
             return False
 
-        no_cycles_raw = np.amax(d[self.headers_normal.cycle_index_txt])
+        # re-use the result if the same tables have been validated before
+        # (the cell resets its cache when raw or steps is set)
+        cache_key = ("step_table_validated", simple)
+        validated = self.cells[dataset_number].cache.get(cache_key)
+        if validated is not None:
+            self.logger.debug("  (already validated)")
+            return validated
+
+        no_cycles_raw = self._max_cycle(self.cells[dataset_number])
         headers_step_table = self.headers_step_table
         no_cycles_step_table = np.amax(s[headers_step_table.cycle])
 
         if simple:
             self.logger.debug("  (simple)")
-            if no_cycles_raw == no_cycles_step_table:
-                return True
-            else:
-                return False
+            validated = bool(no_cycles_raw == no_cycles_step_table)
 
         else:
             validated = True
@@ -1960,34 +2055,29 @@ class CellpyData(object):
                 self.logger.debug("  differ in no. of cycles")
                 validated = False
             else:
-                for j in range(1, no_cycles_raw + 1):
-                    cycle_number = j
-                    no_steps_raw = len(
-                        np.unique(
-                            d.loc[
-                                d[self.headers_normal.cycle_index_txt] == cycle_number,
-                                self.headers_normal.step_index_txt,
-                            ]
-                        )
-                    )
-                    no_steps_step_table = len(
-                        s.loc[
-                            s[headers_step_table.cycle] == cycle_number,
-                            headers_step_table.step,
-                        ]
+                # one groupby on each table instead of masking both tables
+                # for every cycle
+                cycle_numbers = np.arange(1, no_cycles_raw + 1)
+                no_steps_raw = (
+                    d.groupby(self.headers_normal.cycle_index_txt)[
+                        self.headers_normal.step_index_txt
+                    ]
+                    .nunique()
+                    .reindex(cycle_numbers, fill_value=0)
+                )
+                no_steps_step_table = (
+                    s.groupby(headers_step_table.cycle)[headers_step_table.step]
+                    .size()
+                    .reindex(cycle_numbers, fill_value=0)
+                )
+                differ = no_steps_raw.values != no_steps_step_table.values
+                if differ.any():
+                    validated = False
+                    self.logger.debug(
+                        "Error in step table (cycles: %s)", cycle_numbers[differ]
                     )
-                    if no_steps_raw != no_steps_step_table:
-                        validated = False
-                        # txt = ("Error in step table "
-                        #        "(cycle: %i) d: %i, s:%i)" % (
-                        #         cycle_number,
-                        #         no_steps_raw,
-                        #         no_steps_steps
-                        #     )
-                        # )
-                        #
-                        # self.logger.debug(txt)
-            return validated
+        self.cells[dataset_number].cache[cache_key] = validated
+        return validated
 
     def print_steps(self, dataset_number=None):
         """Print the step table."""
@@ -2154,12 +2244,24 @@ class CellpyData(object):
         out = dict()
         self.logger.debug(f"return a dict")
         self.logger.debug(f"dt 4: {time.time() - t0}")
+        if steptable is None:
+            steps_by_cycle_and_type = self._steps_by_cycle_and_type(
+                self.cells[dataset_number]
+            )
+        else:
+            # collecting the steps for each (cycle, type) in one pass over the
+            # selected rows (keeping the order of the step table)
+            selected = st.loc[
+                st[shdr.type].isin(steptypes) & st[shdr.cycle].isin(cycle_numbers)
+            ]
+            steps_by_cycle_and_type = self._collect_steps_by_cycle_and_type(
+                selected
+            )
+
         for cycle in cycle_numbers:
             steplist = []
             for s in steptypes:
-                step = st[(st[shdr.type] == s) & (st[shdr.cycle] == cycle)][
-                    shdr.step
-                ].tolist()
+                step = steps_by_cycle_and_type.get((cycle, s), [])
                 for newstep in step[:trim_taper_steps]:
                     if newstep in steps_to_skip:
                         self.logger.debug(f"skipping step {newstep}")
@@ -2173,6 +2275,29 @@ class CellpyData(object):
 
         return out
 
+    def _steps_by_cycle_and_type(self, cell):
+        # the step numbers of every (cycle, type) in the step table, collected
+        # once and remembered by the cell so that asking for the steps of one
+        # cycle at a time does not filter the full table for each call
+        # (the cell resets its cache when steps is set)
+        steps_by_cycle_and_type = cell.cache.get("steps_by_cycle_and_type")
+        if steps_by_cycle_and_type is None:
+            steps_by_cycle_and_type = self._collect_steps_by_cycle_and_type(
+                cell.steps
+            )
+            cell.cache["steps_by_cycle_and_type"] = steps_by_cycle_and_type
+        return steps_by_cycle_and_type
+
+    def _collect_steps_by_cycle_and_type(self, steps):
+        # (keeping the order of the step table)
+        shdr = self.headers_step_table
+        steps_by_cycle_and_type = {}
+        for cycle, step_type, step in zip(
+            steps[shdr.cycle].values, steps[shdr.type].values, steps[shdr.step].values
+        ):
+            steps_by_cycle_and_type.setdefault((cycle, step_type), []).append(step)
+        return steps_by_cycle_and_type
+
     def load_step_specifications(self, file_name, short=False, dataset_number=None):
         """ Load a table that contains step-type definitions.
 
@@ -2210,10 +2335,15 @@ class CellpyData(object):
 
     def _sort_data(self, dataset):
         # TODO: [# index]
-        if self.headers_normal.data_point_txt in dataset.raw.columns:
-            dataset.raw = dataset.raw.sort_values(
-                self.headers_normal.data_point_txt
-            ).reset_index()
+        data_point_txt = self.headers_normal.data_point_txt
+        if data_point_txt in dataset.raw.columns:
+            # the data points are normally already in order (one pass to
+            # check is much cheaper than sorting the full frame)
+            if not dataset.raw[data_point_txt].is_monotonic_increasing:
+                dataset.raw = dataset.raw.sort_values(
+                    data_point_txt, kind="mergesort"
+                )
+            dataset.raw = dataset.raw.reset_index()
             return dataset
 
         self.logger.debug("_sort_data: no datapoint header to sort by")
@@ -2229,6 +2359,57 @@ class CellpyData(object):
         self.logger.debug("created u-steps")
         return un
 
+    @staticmethod
+    def _percentage_change(first, last):
+        # element-wise change (in %) from first to last; changes starting
+        # from a zero value are given relative to one
+        first = np.asarray(first, dtype=np.float64)
+        last = np.asarray(last, dtype=np.float64)
+        reference = np.where(first == 0.0, 1.0, np.abs(first))
+        return (last - first) * 100 / reference
+
+    @staticmethod
+    def _aggregate_steps(gf, columns):
+        # All the step values are found using the built-in (cythonized)
+        # groupby reductions; first and last are picked by position so that
+        # missing values are kept, and the delta is calculated from them.
+        stats = gf[columns].agg(["mean", "std", "min", "max"])
+
+        # (the first and last row of each group are located from the group
+        # numbers, which follow the order of the aggregated rows; nth is not
+        # used since it returns the original row labels in newer pandas)
+        codes = gf.ngroup().to_numpy()
+        in_group = np.flatnonzero(codes >= 0)  # rows with missing keys: -1
+        codes = codes[in_group]
+        _, first_rows = np.unique(codes, return_index=True)
+        _, last_rows_reversed = np.unique(codes[::-1], return_index=True)
+        last_rows = len(codes) - 1 - last_rows_reversed
+        values = gf.obj[columns]
+        first_values = values.iloc[in_group[first_rows]]
+        first_values.index = stats.index
+        last_values = values.iloc[in_group[last_rows]]
+        last_values.index = stats.index
+
+        # the deltas for all the columns are calculated in one go on the
+        # underlying (steps x columns) arrays
+        deltas = CellpyData._percentage_change(
+            first_values[columns].to_numpy(dtype=np.float64),
+            last_values[columns].to_numpy(dtype=np.float64),
+        )
+
+        df_steps = {}
+        for i, col in enumerate(columns):
+            df_steps[(col, "avr")] = stats[(col, "mean")]
+            df_steps[(col, "std")] = stats[(col, "std")]
+            df_steps[(col, "min")] = stats[(col, "min")]
+            df_steps[(col, "max")] = stats[(col, "max")]
+            df_steps[(col, "first")] = first_values[col]
+            df_steps[(col, "last")] = last_values[col]
+            df_steps[(col, "delta")] = pd.Series(
+                deltas[:, i], index=first_values.index
+            )
+        return pd.DataFrame(df_steps)
+
     def make_step_table(
         self,
         step_specifications=None,
@@ -2287,21 +2468,6 @@ class CellpyData(object):
         if profiling:
             print("PROFILING MAKE_STEP_TABLE".center(80, "="))
 
-        def first(x):
-            return x.iloc[0]
-
-        def last(x):
-            return x.iloc[-1]
-
-        def delta(x):
-            if x.iloc[0] == 0.0:
-                # starts from a zero value
-                difference = 100.0 * x.iloc[-1]
-            else:
-                difference = (x.iloc[-1] - x.iloc[0]) * 100 / abs(x.iloc[0])
-
-            return difference
-
         nhdr = self.headers_normal
         shdr = self.headers_step_table
 
@@ -2332,9 +2498,6 @@ class CellpyData(object):
 
         # only use col-names that exist:
         keep = [col for col in keep if col in df.columns]
-        df = df[keep]
-        # preparing for implementation of sub_steps (will come in the future):
-        df[nhdr.sub_step_index_txt] = 1
 
         # using headers as defined in the internal_settings.py file
         rename_dict = {
@@ -2351,7 +2514,11 @@ class CellpyData(object):
             nhdr.internal_resistance_txt: shdr.internal_resistance,
         }
 
-        df = df.rename(columns=rename_dict)
+        # (selecting the columns already gives a new frame, so the renaming
+        # does not need to copy the data once more)
+        df = df[keep].rename(columns=rename_dict, copy=False)
+        # preparing for implementation of sub_steps (will come in the future):
+        df[shdr.sub_step] = 1
 
         by = [shdr.cycle, shdr.step, shdr.sub_step]
 
@@ -2369,9 +2536,13 @@ class CellpyData(object):
             time_01 = time.time()
 
         gf = df.groupby(by=by)
-        df_steps = gf.agg(
-            [np.mean, np.std, np.amin, np.amax, first, last, delta]
-        ).rename(columns={"amin": "min", "amax": "max", "mean": "avr"})
+        # (non-numeric columns can not be aggregated and are left out)
+        value_columns = [
+            col
+            for col in df.columns
+            if col not in by and pd.api.types.is_numeric_dtype(df[col])
+        ]
+        df_steps = self._aggregate_steps(gf, value_columns)
 
         # TODO: [#index]
         df_steps = df_steps.reset_index()
@@ -2412,97 +2583,72 @@ class CellpyData(object):
             stable_charge_limit_soft = self.raw_limits["stable_charge_soft"]
             ir_change_limit = self.raw_limits["ir_change"]
 
-            mask_no_current_hard = (
-                df_steps.loc[:, (shdr.current, "max")].abs()
-                + df_steps.loc[:, (shdr.current, "min")].abs()
-            ) < current_limit_value_hard / 2
-
-            mask_voltage_down = (
-                df_steps.loc[:, (shdr.voltage, "delta")] < -stable_voltage_limit_hard
-            )
-
-            mask_voltage_up = (
-                df_steps.loc[:, (shdr.voltage, "delta")] > stable_voltage_limit_hard
-            )
-
-            mask_voltage_stable = (
-                df_steps.loc[:, (shdr.voltage, "delta")].abs()
-                < stable_voltage_limit_hard
-            )
-
-            mask_current_down = (
-                df_steps.loc[:, (shdr.current, "delta")] < -stable_current_limit_soft
-            )
-
-            mask_current_up = (
-                df_steps.loc[:, (shdr.current, "delta")] > stable_current_limit_soft
-            )
-
-            mask_current_negative = (
-                df_steps.loc[:, (shdr.current, "avr")] < -current_limit_value_hard
-            )
-
-            mask_current_positive = (
-                df_steps.loc[:, (shdr.current, "avr")] > current_limit_value_hard
-            )
-
-            mask_galvanostatic = (
-                df_steps.loc[:, (shdr.current, "delta")].abs()
-                < stable_current_limit_soft
-            )
-
-            mask_charge_changed = (
-                df_steps.loc[:, (shdr.charge, "delta")].abs() > stable_charge_limit_hard
-            )
-
-            mask_discharge_changed = (
-                df_steps.loc[:, (shdr.discharge, "delta")].abs()
-                > stable_charge_limit_hard
-            )
+            # the masks are made directly on the underlying arrays (no index
+            # alignment needed since they all come from df_steps)
+            current_max = df_steps[(shdr.current, "max")].to_numpy()
+            current_min = df_steps[(shdr.current, "min")].to_numpy()
+            current_avr = df_steps[(shdr.current, "avr")].to_numpy()
+            current_delta = df_steps[(shdr.current, "delta")].to_numpy()
+            voltage_delta = df_steps[(shdr.voltage, "delta")].to_numpy()
+            charge_delta = df_steps[(shdr.charge, "delta")].to_numpy()
+            discharge_delta = df_steps[(shdr.discharge, "delta")].to_numpy()
+
+            with np.errstate(invalid="ignore"):
+                mask_no_current_hard = (
+                    np.abs(current_max) + np.abs(current_min)
+                ) < current_limit_value_hard / 2
+
+                mask_voltage_down = voltage_delta < -stable_voltage_limit_hard
+                mask_voltage_up = voltage_delta > stable_voltage_limit_hard
+                mask_voltage_stable = np.abs(voltage_delta) < stable_voltage_limit_hard
+
+                mask_current_down = current_delta < -stable_current_limit_soft
+                mask_current_up = current_delta > stable_current_limit_soft
+                mask_current_negative = current_avr < -current_limit_value_hard
+                mask_current_positive = current_avr > current_limit_value_hard
+                mask_galvanostatic = np.abs(current_delta) < stable_current_limit_soft
+
+                mask_charge_changed = np.abs(charge_delta) > stable_charge_limit_hard
+                mask_discharge_changed = (
+                    np.abs(discharge_delta) > stable_charge_limit_hard
+                )
 
-            mask_no_change = (
-                (df_steps.loc[:, (shdr.voltage, "delta")] == 0)
-                & (df_steps.loc[:, (shdr.current, "delta")] == 0)
-                & (df_steps.loc[:, (shdr.charge, "delta")] == 0)
-                & (df_steps.loc[:, (shdr.discharge, "delta")] == 0)
-            )
+                mask_no_change = (
+                    (voltage_delta == 0)
+                    & (current_delta == 0)
+                    & (charge_delta == 0)
+                    & (discharge_delta == 0)
+                )
 
             # TODO: make an option for only checking unique steps
             #     e.g.
             #     df_x = df_steps.where.steps.are.unique
 
             self.logger.debug("masking and labelling steps")
-            df_steps.loc[mask_no_current_hard & mask_voltage_stable, shdr.type] = "rest"
-
-            df_steps.loc[
-                mask_no_current_hard & mask_voltage_up, shdr.type
-            ] = "ocvrlx_up"
-
-            df_steps.loc[
-                mask_no_current_hard & mask_voltage_down, shdr.type
-            ] = "ocvrlx_down"
-
-            df_steps.loc[
-                mask_discharge_changed & mask_current_negative, shdr.type
-            ] = "discharge"
-
-            df_steps.loc[
-                mask_charge_changed & mask_current_positive, shdr.type
-            ] = "charge"
-
-            df_steps.loc[
-                mask_voltage_stable & mask_current_negative & mask_current_down,
-                shdr.type,
-            ] = "cv_discharge"
-
-            df_steps.loc[
-                mask_voltage_stable & mask_current_positive & mask_current_down,
-                shdr.type,
-            ] = "cv_charge"
-
-            # --- internal resistance ----
-            df_steps.loc[mask_no_change, shdr.type] = "ir"
-            # assumes that IR is stored in just one row
+            # labelling all the steps in one go (np.select uses the first
+            # matching condition, so the labels are listed by precedence)
+            step_labels = [
+                # internal resistance (assumes that IR is stored in just one row)
+                ("ir", mask_no_change),
+                (
+                    "cv_charge",
+                    mask_voltage_stable & mask_current_positive & mask_current_down,
+                ),
+                (
+                    "cv_discharge",
+                    mask_voltage_stable & mask_current_negative & mask_current_down,
+                ),
+                ("charge", mask_charge_changed & mask_current_positive),
+                ("discharge", mask_discharge_changed & mask_current_negative),
+                ("ocvrlx_down", mask_no_current_hard & mask_voltage_down),
+                ("ocvrlx_up", mask_no_current_hard & mask_voltage_up),
+                ("rest", mask_no_current_hard & mask_voltage_stable),
+            ]
+            df_steps[shdr.type] = np.select(
+                [mask for _, mask in step_labels],
+                [label for label, _ in step_labels],
+                default=df_steps[shdr.type].to_numpy(dtype=object),
+            )
 
             # --- sub-step-txt -----------
             df_steps[shdr.sub_type] = None
@@ -2524,24 +2670,30 @@ class CellpyData(object):
 
         else:
             self.logger.debug("parsing custom step definition")
+            # look up the specification for each step in a dictionary (the
+            # last specification wins) instead of masking the full step
+            # table for every specification row
             if not short:
                 self.logger.debug("using long format (cycle,step)")
-                for row in step_specifications.itertuples():
-                    df_steps.loc[
-                        (df_steps[shdr.step] == row.step)
-                        & (df_steps[shdr.cycle] == row.cycle),
-                        "type",
-                    ] = row.type
-                    df_steps.loc[
-                        (df_steps[shdr.step] == row.step)
-                        & (df_steps[shdr.cycle] == row.cycle),
-                        "info",
-                    ] = row.info
+                specifications = {
+                    (row.cycle, row.step): (row.type, row.info)
+                    for row in step_specifications.itertuples()
+                }
+                keys = zip(df_steps[shdr.cycle], df_steps[shdr.step])
             else:
                 self.logger.debug("using short format (step)")
-                for row in step_specifications.itertuples():
-                    df_steps.loc[df_steps[shdr.step] == row.step, "type"] = row.type
-                    df_steps.loc[df_steps[shdr.step] == row.step, "info"] = row.info
+                specifications = {
+                    row.step: (row.type, row.info)
+                    for row in step_specifications.itertuples()
+                }
+                keys = df_steps[shdr.step]
+            matched = [specifications.get(key) for key in keys]
+            mask = np.array([spec is not None for spec in matched], dtype=bool)
+            if mask.any():
+                matched = [spec for spec in matched if spec is not None]
+                types, infos = zip(*matched)
+                df_steps.loc[mask, "type"] = np.array(types, dtype=object)
+                df_steps.loc[mask, "info"] = np.array(infos, dtype=object)
 
         if profiling:
             print(f"*** introspect: {time.time() - time_01} s")
@@ -2610,15 +2762,17 @@ class CellpyData(object):
         # no_cycles=np.amax(test.raw[c_txt])
         # print d.columns
 
-        if not any(test.raw.columns == c_txt):
+        if c_txt not in test.raw.columns:
             self.logger.info("ERROR - cannot find %s" % c_txt)
             sys.exit(-1)
-        if not any(test.raw.columns == s_txt):
+        if s_txt not in test.raw.columns:
             self.logger.info("ERROR - cannot find %s" % s_txt)
             sys.exit(-1)
 
         # self.logger.debug(f"selecting cycle {cycle} step {step}")
-        v = test.raw[(test.raw[c_txt] == cycle) & (test.raw[s_txt] == step)]
+        # the rows are picked by their positions instead of scanning the raw data
+        positions = self._cycle_step_positions(test)
+        v = test.raw.iloc[positions.get((cycle, step), [])]
 
         if self.is_empty(v):
             self.logger.debug("empty dataframe")
@@ -2686,14 +2840,10 @@ class CellpyData(object):
                     _last = c.iat[-1]
                     _first = c.iat[0]
 
-                    c = c.tolist()
-                    v = v.tolist()
                     header_x = "cap cycle_no %i" % cycle
                     header_y = "voltage cycle_no %i" % cycle
-                    c.insert(0, header_x)
-                    v.insert(0, header_y)
-                    out_data.append(c)
-                    out_data.append(v)
+                    out_data.append(c.reset_index(drop=True).rename(header_x))
+                    out_data.append(v.reset_index(drop=True).rename(header_y))
                     # txt = "extracted cycle %i" % cycle
                     # self.logger.debug(txt)
             except IndexError as e:
@@ -2701,13 +2851,8 @@ class CellpyData(object):
                 self.logger.info(txt)
                 self.logger.debug(e)
 
-        # Saving cycles in one .csv file (x,y,x,y,x,y...)
-        # print "saving the file with delimiter '%s' " % (sep)
         self.logger.debug("writing cycles to file")
-        with open(outname, "w", newline="") as f:
-            writer = csv.writer(f, delimiter=sep)
-            writer.writerows(itertools.zip_longest(*out_data))
-            # star (or asterix) means transpose (writing cols instead of rows)
+        self._write_cycles(out_data, outname, sep)
 
         self.logger.info(f"The file {outname} was created")
         self.logger.debug(f"(dt: {(time.time() - time_00):4.2f}s)")
@@ -2763,14 +2908,10 @@ class CellpyData(object):
                     _last = c.iat[-1]
                     _first = c.iat[0]
 
-                    c = c.tolist()
-                    v = v.tolist()
                     header_x = "cap cycle_no %i" % cycle
                     header_y = "voltage cycle_no %i" % cycle
-                    c.insert(0, header_x)
-                    v.insert(0, header_y)
-                    out_data.append(c)
-                    out_data.append(v)
+                    out_data.append(c.reset_index(drop=True).rename(header_x))
+                    out_data.append(v.reset_index(drop=True).rename(header_y))
                     # txt = "extracted cycle %i" % cycle
                     # self.logger.debug(txt)
             except IndexError as e:
@@ -2778,15 +2919,31 @@ class CellpyData(object):
                 self.logger.info(txt)
                 self.logger.debug(e)
 
-        # Saving cycles in one .csv file (x,y,x,y,x,y...)
-        # print "saving the file with delimiter '%s' " % (sep)
         self.logger.debug("writing cycles to file")
-        with open(outname, "w", newline="") as f:
-            writer = csv.writer(f, delimiter=sep)
-            writer.writerows(itertools.zip_longest(*out_data))
-            # star (or asterix) means transpose (writing cols instead of rows)
+        self._write_cycles(out_data, outname, sep)
         self.logger.info(f"The file {outname} was created")
 
+    @staticmethod
+    def _write_cycles(out_data, outname, sep, block_size=None):
+        # Saving cycles in one .csv file (x,y,x,y,x,y...)
+        # (the columns are aligned by position, shorter cycles are padded
+        # with empty fields). The rows are written to the open file in blocks
+        # so that the full wide table is never built in memory. By default the
+        # number of rows in a block is chosen so that a block holds about a
+        # million values, however many cycles there are.
+        with open(outname, "w", newline="") as f:
+            if not out_data:
+                return
+            if block_size is None:
+                block_size = max(1, 1_000_000 // len(out_data))
+            number_of_rows = max(len(column) for column in out_data)
+            for start in range(0, max(number_of_rows, 1), block_size):
+                block = pd.concat(
+                    [column.iloc[start : start + block_size] for column in out_data],
+                    axis=1,
+                )
+                block.to_csv(f, sep=sep, index=False, header=start == 0)
+
     def _export_normal(self, data, setname=None, sep=None, outname=None):
         time_00 = time.time()
         lastname = "_normal.csv"
@@ -2874,6 +3031,10 @@ class CellpyData(object):
             shift: start-value for charge (or discharge)
             last_cycle: process only up to this cycle (if not None).
 
+        The raw, step and summary files are written one by one unless
+        prms.Reader.csv_export_workers is larger than one; then they are
+        written from a thread pool (each task writes its own file).
+
         Returns: Nothing
 
         """
@@ -2883,6 +3044,8 @@ class CellpyData(object):
 
         self.logger.debug("saving to csv")
 
+        # (export function, data, file name) for the independent files
+        export_tasks = []
         dataset_number = -1
         for data in self.cells:
             dataset_number += 1
@@ -2908,16 +3071,18 @@ class CellpyData(object):
 
                 if raw:
                     outname_normal = firstname + "_normal.csv"
-                    self._export_normal(data, outname=outname_normal, sep=sep)
+                    export_tasks.append((self._export_normal, data, outname_normal))
                     if data.steps_made is True:
                         outname_steps = firstname + "_steps.csv"
-                        self._export_steptable(data, outname=outname_steps, sep=sep)
+                        export_tasks.append(
+                            (self._export_steptable, data, outname_steps)
+                        )
                     else:
                         self.logger.debug("steps_made is not True")
 
                 if summary:
                     outname_stats = firstname + "_stats.csv"
-                    self._export_stats(data, outname=outname_stats, sep=sep)
+                    export_tasks.append((self._export_stats, data, outname_stats))
 
                 if cycles:
                     outname_cycles = firstname + "_cycles.csv"
@@ -2931,6 +3096,23 @@ class CellpyData(object):
                         last_cycle=last_cycle,
                     )
 
+        workers = min(prms.Reader.csv_export_workers or 1, len(export_tasks))
+        if workers <= 1:
+            for export, data, outname in export_tasks:
+                export(data, outname=outname, sep=sep)
+            return
+
+        self.logger.debug(
+            "writing %i csv files using %i threads", len(export_tasks), workers
+        )
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(export, data, outname=outname, sep=sep)
+                for export, data, outname in export_tasks
+            ]
+            for future in futures:
+                future.result()
+
     def save(
         self,
         filename,
@@ -3003,8 +3185,9 @@ class CellpyData(object):
                     self.logger.info(e)
                     return
             else:
-                self.logger.info("Save (hdf5): file exist - did not save", end=" ")
-                self.logger.info(outfile_all)
+                self.logger.info(
+                    "Save (hdf5): file exist - did not save %s", outfile_all
+                )
                 return
 
         if ensure_step_table:
@@ -3038,13 +3221,14 @@ class CellpyData(object):
         self.logger.debug(txt)
 
         warnings.simplefilter("ignore", PerformanceWarning)
+        # (any old file is already removed, so the store is created from scratch)
+        store = pd.HDFStore(
+            outfile_all,
+            mode="w",
+            complib=prms._cellpyfile_complib,
+            complevel=prms._cellpyfile_complevel,
+        )
         try:
-            store = pd.HDFStore(
-                outfile_all,
-                complib=prms._cellpyfile_complib,
-                complevel=prms._cellpyfile_complevel,
-            )
-
             self.logger.debug("trying to put raw data")
 
             self.logger.debug(" - lets set Data_Point as index")
@@ -3052,9 +3236,28 @@ class CellpyData(object):
             hdr_data_point = self.headers_normal.data_point_txt
 
             if test.raw.index.name != hdr_data_point:
-                test.raw = test.raw.set_index(hdr_data_point, drop=False)
-
-            store.put(root + raw_dir, test.raw, format=prms._cellpyfile_raw_format)
+                # (in place to avoid copying all the raw data before writing)
+                test.raw.set_index(hdr_data_point, drop=False, inplace=True)
+
+            if prms._cellpyfile_raw_format == "table":
+                # Writing the rows in batches keeps the temporary record arrays
+                # small, and telling PyTables the number of rows up front gives
+                # it a sensible chunk shape (the default assumes 10 000 rows).
+                # The data columns make it possible to select on cycles and
+                # steps when reading.
+                store.append(
+                    root + raw_dir,
+                    test.raw,
+                    format="table",
+                    chunksize=prms._cellpyfile_raw_chunksize,
+                    expectedrows=len(test.raw),
+                    data_columns=[
+                        self.headers_normal.cycle_index_txt,
+                        self.headers_normal.step_index_txt,
+                    ],
+                )
+            else:
+                store.put(root + raw_dir, test.raw, format=prms._cellpyfile_raw_format)
             self.logger.debug(" raw -> hdf5 OK")
 
             self.logger.debug("trying to put summary")
@@ -3070,7 +3273,22 @@ class CellpyData(object):
             self.logger.debug(" meta -> hdf5 OK")
 
             self.logger.debug("trying to put fidtable")
-            store.put(root + fid_dir, fidtbl, format=prms._cellpyfile_fidtable_format)
+            if fidtbl.empty:
+                # (pandas does not write a table node for an empty frame)
+                store.put(root + fid_dir, fidtbl, format="fixed")
+            elif prms._cellpyfile_fidtable_format == "table":
+                # the FileID objects can not be stored in a table (and are
+                # never read back - the fids are created from the columns)
+                store.put(
+                    root + fid_dir,
+                    fidtbl.drop(columns="raw_data_fid", errors="ignore"),
+                    format="table",
+                    data_columns=FileIDTable.fidtable_columns,
+                )
+            else:
+                store.put(
+                    root + fid_dir, fidtbl, format=prms._cellpyfile_fidtable_format
+                )
             self.logger.debug(" fid -> hdf5 OK")
 
             self.logger.debug("trying to put step")
@@ -3095,6 +3313,7 @@ class CellpyData(object):
             #                          optlevel=9, kind='full')
         finally:
             store.close()
+            self.clear_file_id_cache()
         self.logger.debug(" all -> hdf5 OK")
         warnings.simplefilter("default", PerformanceWarning)
         # del store
@@ -3112,6 +3331,7 @@ class CellpyData(object):
                 dataset.steps[col] = dataset.steps[col].apply(pd.to_numeric)
             else:
                 dataset.steps[col] = dataset.steps[col].astype("str")
+        dataset.reset_cache()
         return dataset
 
     # TODO: check if this is useful and if it is rename, if not delete
@@ -3120,20 +3340,11 @@ class CellpyData(object):
         time_00 = time.time()
         discharge_title = self.headers_normal.discharge_capacity_txt
         charge_title = self.headers_normal.charge_capacity_txt
-        chargecap = 0.0
-        dischargecap = 0.0
-
-        # TODO: @jepe - use pd.loc[row,column]
 
         if capacity_modifier == "reset":
-
-            for index, row in summary.iterrows():
-                dischargecap_2 = row[discharge_title]
-                summary.loc[index, discharge_title] = dischargecap_2 - dischargecap
-                dischargecap = dischargecap_2
-                chargecap_2 = row[charge_title]
-                summary.loc[index, charge_title] = chargecap_2 - chargecap
-                chargecap = chargecap_2
+            # each row gets the change from the previous row
+            for title in (discharge_title, charge_title):
+                summary[title] = np.diff(summary[title].to_numpy(), prepend=0.0)
         else:
             raise NotImplementedError
 
@@ -3160,58 +3371,46 @@ class CellpyData(object):
 
         raw = self.cells[dataset_number].raw
 
-        chargecap = 0.0
-        dischargecap = 0.0
-
         if capacity_modifier == "reset":
-            # discharge cycles
-            no_cycles = np.amax(raw[cycle_index_header])
-            for j in range(1, no_cycles + 1):
-                cap_type = "discharge"
-                e_header = discharge_energy_index_header
-                cap_header = discharge_index_header
-                discharge_cycles = self.get_step_numbers(
+            no_cycles = self._max_cycle(self.cells[dataset_number])
+            cycle_numbers = list(range(1, no_cycles + 1))
+            # the index columns are pulled out once, and each (cycle, step)
+            # pair is encoded as a single integer for the look-ups
+            cycle_array = raw[cycle_index_header].to_numpy()
+            step_array = raw[step_index_header].to_numpy()
+            step_base = step_array.max() + 1
+            raw_cycle_steps = cycle_array * step_base + step_array
+            for cap_type, cap_header, e_header in (
+                ("discharge", discharge_index_header, discharge_energy_index_header),
+                ("charge", charge_index_header, charge_energy_index_header),
+            ):
+                self.logger.debug(f"resetting {cap_type} capacities")
+                step_numbers = self.get_step_numbers(
                     steptype=cap_type,
                     allctypes=allctypes,
-                    cycle_number=j,
+                    cycle_number=cycle_numbers,
                     dataset_number=dataset_number,
                 )
-
-                steps = discharge_cycles[j]
-                txt = "Cycle  %i (discharge):  " % j
-                self.logger.debug(txt)
-                # TODO: @jepe - use pd.loc[row,column] e.g. pd.loc[:,"charge_cap"]
-                # for col or pd.loc[(pd.["step"]==1),"x"]
-                selection = (raw[cycle_index_header] == j) & (
-                    raw[step_index_header].isin(steps)
-                )
-                c0 = raw[selection].iloc[0][cap_header]
-                e0 = raw[selection].iloc[0][e_header]
-                raw.loc[selection, cap_header] = raw.loc[selection, cap_header] - c0
-                raw.loc[selection, e_header] = raw.loc[selection, e_header] - e0
-
-                cap_type = "charge"
-                e_header = charge_energy_index_header
-                cap_header = charge_index_header
-                charge_cycles = self.get_step_numbers(
-                    steptype=cap_type,
-                    allctypes=allctypes,
-                    cycle_number=j,
-                    dataset_number=dataset_number,
-                )
-                steps = charge_cycles[j]
-                txt = "Cycle  %i (charge):  " % j
-                self.logger.debug(txt)
-
-                selection = (raw[cycle_index_header] == j) & (
-                    raw[step_index_header].isin(steps)
+                cycle_steps = [
+                    cycle * step_base + step
+                    for cycle, steps in step_numbers.items()
+                    for step in steps
+                ]
+                selection = np.isin(raw_cycle_steps, cycle_steps)
+                if not selection.any():
+                    continue
+
+                # subtracting the first value within each cycle (all the rows
+                # of the selected steps are handled in one go)
+                # (the columns are modified as arrays and written back whole)
+                _, first_rows, cycle_positions = np.unique(
+                    cycle_array[selection], return_index=True, return_inverse=True
                 )
-
-                if any(selection):
-                    c0 = raw[selection].iloc[0][cap_header]
-                    e0 = raw[selection].iloc[0][e_header]
-                    raw.loc[selection, cap_header] = raw.loc[selection, cap_header] - c0
-                    raw.loc[selection, e_header] = raw.loc[selection, e_header] - e0
+                for header in (cap_header, e_header):
+                    values = raw[header].to_numpy(copy=True)
+                    selected = values[selection]
+                    values[selection] = selected - selected[first_rows][cycle_positions]
+                    raw[header] = values
         self.logger.debug(f"(dt: {(time.time() - time_00):4.2f}s)")
 
     def get_number_of_tests(self):
@@ -3230,6 +3429,17 @@ class CellpyData(object):
         # TODO: remove me
         return self.cells[n]
 
+    def _collect_by_cycle(self, raw, column, cycles):
+        # gives a list with the column values for each of the cycles (empty
+        # if the cycle is missing), splitting the raw data in one groupby
+        # instead of masking it for every cycle
+        cycle_index_header = self.headers_normal.cycle_index_txt
+        groups = dict(list(raw.groupby(cycle_index_header, sort=False)[column]))
+        return [
+            groups[cycle] if cycle in groups else raw[column].iloc[:0]
+            for cycle in cycles
+        ]
+
     def sget_voltage(self, cycle, step, set_number=None):
         """Returns voltage for cycle, step.
 
@@ -3308,13 +3518,10 @@ class CellpyData(object):
         else:
             if not full:
                 self.logger.debug("getting list of voltage-curves for all cycles")
-                v = []
-                no_cycles = np.amax(test[cycle_index_header])
-                for j in range(1, no_cycles + 1):
-                    txt = "Cycle  %i:  " % j
-                    self.logger.debug(txt)
-                    c = test[(test[cycle_index_header] == j)]
-                    v.append(c[voltage_header])
+                no_cycles = self._max_cycle(self.cells[dataset_number])
+                v = self._collect_by_cycle(
+                    test, voltage_header, range(1, no_cycles + 1)
+                )
             else:
                 self.logger.debug("getting frame of all voltage-curves")
                 v = test[voltage_header]
@@ -3351,13 +3558,10 @@ class CellpyData(object):
         else:
             if not full:
                 self.logger.debug("getting a list of current-curves for all cycles")
-                v = []
-                no_cycles = np.amax(test[cycle_index_header])
-                for j in range(1, no_cycles + 1):
-                    txt = "Cycle  %i:  " % j
-                    self.logger.debug(txt)
-                    c = test[(test[cycle_index_header] == j)]
-                    v.append(c[current_header])
+                no_cycles = self._max_cycle(self.cells[dataset_number])
+                v = self._collect_by_cycle(
+                    test, current_header, range(1, no_cycles + 1)
+                )
             else:
                 self.logger.debug("getting all current-curves ")
                 v = test[current_header]
@@ -3461,13 +3665,8 @@ class CellpyData(object):
         else:
             if not full:
                 self.logger.debug("getting datetime for all cycles")
-                v = []
                 cycles = self.get_cycle_numbers()
-                for j in cycles:
-                    txt = "Cycle  %i:  " % j
-                    self.logger.debug(txt)
-                    c = test[(test[cycle_index_header] == j)]
-                    v.append(c[datetime_header])
+                v = self._collect_by_cycle(test, datetime_header, cycles)
             else:
                 self.logger.debug("returning full datetime col")
                 v = test[datetime_header]
@@ -3506,13 +3705,8 @@ class CellpyData(object):
         else:
             if not full:
                 self.logger.debug("getting timestapm for all cycles")
-                v = []
                 cycles = self.get_cycle_numbers()
-                for j in cycles:
-                    txt = "Cycle  %i:  " % j
-                    self.logger.debug(txt)
-                    c = test[(test[cycle_index_header] == j)]
-                    v.append(c[timestamp_header])
+                v = self._collect_by_cycle(test, timestamp_header, cycles)
             else:
                 self.logger.debug("returning full timestamp col")
                 v = test[timestamp_header]
@@ -3625,6 +3819,7 @@ class CellpyData(object):
 
         if not isinstance(cycle, (collections.Iterable,)):
             cycle = [cycle]
+        cycle = list(cycle)
 
         if split and not (categorical_column or label_cycle_number):
             return_dataframe = False
@@ -3639,17 +3834,47 @@ class CellpyData(object):
             )
             method = "back-and-forth"
 
-        capacity = None
-        voltage = None
-        cycle_df = pd.DataFrame()
+        # collecting the per-cycle pieces and concatenating once at the end
+        cycle_frames = []
+        capacity_parts = []
+        voltage_parts = []
+
+        # finding the step numbers for all the cycles in one go
+        step_numbers = {
+            cap_type: self.get_step_numbers(
+                steptype=cap_type,
+                allctypes=False,
+                cycle_number=cycle,
+                dataset_number=dataset_number,
+                trim_taper_steps=kwargs.get("trim_taper_steps"),
+                steps_to_skip=kwargs.get("steps_to_skip"),
+                steptable=kwargs.get("steptable"),
+            )
+            for cap_type in ("charge", "discharge")
+        }
+        mass = self.get_mass(dataset_number)
 
         initial = True
         for current_cycle in cycle:
             error = False
             # self.logger.debug(f"processing cycle {current_cycle}")
             try:
-                cc, cv = self.get_ccap(current_cycle, dataset_number, **kwargs)
-                dc, dv = self.get_dcap(current_cycle, dataset_number, **kwargs)
+                cc, cv = self._get_cap(
+                    current_cycle,
+                    dataset_number,
+                    "charge",
+                    step_numbers=step_numbers["charge"],
+                    mass=mass,
+                    **kwargs,
+                )
+                dc, dv = self._get_cap(
+                    current_cycle,
+                    dataset_number,
+                    "discharge",
+                    step_numbers=step_numbers["discharge"],
+                    mass=mass,
+                    **kwargs,
+                )
             except NullData as e:
                 error = True
                 self.logger.debug(e)
@@ -3774,22 +3999,22 @@ class CellpyData(object):
                             c.insert(0, "cycle", current_cycle)
                             # c["cycle"] = current_cycle
                             # c = c[["cycle", "voltage", "capacity", "direction"]]
-                        if cycle_df.empty:
-                            cycle_df = c
-                        else:
-                            cycle_df = pd.concat([cycle_df, c], axis=0)
+                        cycle_frames.append(c)
 
                 else:
                     logging.warning("returning non-dataframe")
-                    c = pd.concat([_first_step_c, _last_step_c], axis=0)
-                    v = pd.concat([_first_step_v, _last_step_v], axis=0)
-
-                    capacity = pd.concat([capacity, c], axis=0)
-                    voltage = pd.concat([voltage, v], axis=0)
+                    capacity_parts.extend([_first_step_c, _last_step_c])
+                    voltage_parts.extend([_first_step_v, _last_step_v])
 
         if return_dataframe:
-            return cycle_df
+            if not cycle_frames:
+                return pd.DataFrame()
+            return pd.concat(cycle_frames, axis=0)
         else:
+            capacity = voltage = None
+            if capacity_parts:
+                capacity = pd.concat(capacity_parts, axis=0)
+                voltage = pd.concat(voltage_parts, axis=0)
             return capacity, voltage
 
     def _get_cap(
@@ -3800,30 +4025,36 @@ class CellpyData(object):
         trim_taper_steps=None,
         steps_to_skip=None,
         steptable=None,
+        step_numbers=None,
+        mass=None,
     ):
         # used when extracting capacities (get_ccap, get_dcap)
+        # (step_numbers and mass can be given if they are already known,
+        # e.g. when iterating through many cycles)
         # TODO: @jepe - does not allow for constant voltage yet?
         # TODO: @jepe - add similar function that returns pd.DataFrame
         dataset_number = self._validate_dataset_number(dataset_number)
         if dataset_number is None:
             self._report_empty_dataset()
             return
-        test = self.cells[dataset_number]
-        mass = self.get_mass(dataset_number)
+        if mass is None:
+            mass = self.get_mass(dataset_number)
         if cap_type == "charge_capacity":
             cap_type = "charge"
         elif cap_type == "discharge_capacity":
             cap_type = "discharge"
 
-        cycles = self.get_step_numbers(
-            steptype=cap_type,
-            allctypes=False,
-            cycle_number=cycle,
-            dataset_number=dataset_number,
-            trim_taper_steps=trim_taper_steps,
-            steps_to_skip=steps_to_skip,
-            steptable=steptable,
-        )
+        if step_numbers is None:
+            step_numbers = self.get_step_numbers(
+                steptype=cap_type,
+                allctypes=False,
+                cycle_number=cycle,
+                dataset_number=dataset_number,
+                trim_taper_steps=trim_taper_steps,
+                steps_to_skip=steps_to_skip,
+                steptable=steptable,
+            )
+        cycles = step_numbers
 
         c = pd.Series()
         v = pd.Series()
@@ -3837,7 +4068,8 @@ class CellpyData(object):
             selected_step = self._select_step(cycle, step, dataset_number)
             if not self.is_empty(selected_step):
                 v = selected_step[self.headers_normal.voltage_txt]
-                c = selected_step[column_txt] * 1000000 / mass
+                # scale with one factor (one temporary Series instead of two)
+                c = selected_step[column_txt] * (1000000 / mass)
             else:
                 self.logger.debug("could not find any steps for this cycle")
                 txt = "(c:%i s:%i type:%s)" % (cycle, step, cap_type)
@@ -3947,6 +4179,38 @@ class CellpyData(object):
 
         return selected_df
 
+    def _max_cycle(self, cell):
+        # the highest cycle number in the raw data, remembered by the cell so
+        # that repeated getter calls do not reduce the full column every time
+        # (the cell resets its cache when raw is set, and the methods that
+        # change the cycle numbers in place reset it explicitly)
+        max_cycle = cell.cache.get("max_cycle")
+        if max_cycle is None:
+            max_cycle = cell.raw[self.headers_normal.cycle_index_txt].to_numpy().max()
+            cell.cache["max_cycle"] = max_cycle
+        return max_cycle
+
+    def _cycle_numbers(self, cell):
+        # the unique cycle numbers (in order of appearance) of the raw data,
+        # found with a hash-based unique and remembered by the cell
+        cycles = cell.cache.get("cycle_numbers")
+        if cycles is None:
+            raw = cell.raw
+            cycles = pd.unique(raw[self.headers_normal.cycle_index_txt].dropna())
+            cell.cache["cycle_numbers"] = cycles
+        return cycles
+
+    def _cycle_step_positions(self, cell):
+        # the row positions of each (cycle, step) pair in the raw data, found
+        # in one groupby and remembered by the cell (as for _max_cycle)
+        positions = cell.cache.get("cycle_step_positions")
+        if positions is None:
+            c_txt = self.headers_normal.cycle_index_txt
+            s_txt = self.headers_normal.step_index_txt
+            positions = cell.raw.groupby([c_txt, s_txt], sort=False).indices
+            cell.cache["cycle_step_positions"] = positions
+        return positions
+
     def get_number_of_cycles(self, dataset_number=None, steptable=None):
         """Get the number of cycles in the test."""
         if steptable is None:
@@ -3954,8 +4218,7 @@ class CellpyData(object):
             if dataset_number is None:
                 self._report_empty_dataset()
                 return
-            d = self.cells[dataset_number].raw
-            no_cycles = np.amax(d[self.headers_normal.cycle_index_txt])
+            no_cycles = self._max_cycle(self.cells[dataset_number])
         else:
             no_cycles = np.amax(steptable[self.headers_step_table.cycle])
         return no_cycles
@@ -3968,8 +4231,8 @@ class CellpyData(object):
             if dataset_number is None:
                 self._report_empty_dataset()
                 return
-            d = self.cells[dataset_number].raw
-            cycles = d[self.headers_normal.cycle_index_txt].dropna().unique()
+            # (a copy, so that the cached cycle numbers are not modified)
+            cycles = self._cycle_numbers(self.cells[dataset_number]).copy()
         else:
             self.logger.debug("steptable is not none")
             cycles = steptable[self.headers_step_table.cycle].dropna().unique()
@@ -4111,17 +4374,13 @@ class CellpyData(object):
         the DataFrame. The last col in col_name will come first (processed last)
         """
 
-        column_headings = df.columns
-        column_headings = column_headings.tolist()
-        try:
-            for col_name in col_names:
-                i = column_headings.index(col_name)
-                column_headings.pop(column_headings.index(col_name))
-                column_headings.insert(0, col_name)
-
-        finally:
-            df = df.reindex(columns=column_headings)
-            return df
+        column_headings = df.columns.tolist()
+        existing = set(column_headings)
+        # (as before, the names after the first missing one are not moved)
+        moved = list(itertools.takewhile(existing.__contains__, col_names))
+        first = dict.fromkeys(reversed(moved))
+        rest = [col_name for col_name in column_headings if col_name not in first]
+        return df.reindex(columns=[*first, *rest])
 
     def set_dataset_number_force(self, dataset_number=0):
         """Force to set testnumber.
@@ -4148,21 +4407,12 @@ class CellpyData(object):
         """
         warnings.warn("Deprecated", DeprecationWarning)
         self.logger.debug("***set_testnumber(n)")
-        if not isinstance(dataset_number, int):
-            dataset_number_txt = dataset_number
-            try:
-                if dataset_number_txt.lower() in ["last", "end", "newest"]:
-                    dataset_number = -1
-                elif dataset_number_txt.lower() in [
-                    "first",
-                    "zero",
-                    "beginning",
-                    "default",
-                ]:
-                    dataset_number = 0
-            except Exception as e:
-                self.logger.debug("assuming numeric")
-                warnings.warn(f"Unhandled exception raised: {e}")
+        if isinstance(dataset_number, str):
+            dataset_number = DATASET_NUMBER_ALIASES.get(
+                dataset_number.lower(), dataset_number
+            )
+        elif not isinstance(dataset_number, int):
+            self.logger.debug("assuming numeric")
 
         number_of_tests = len(self.cells)
         if dataset_number >= number_of_tests:
@@ -4224,21 +4474,22 @@ class CellpyData(object):
 
     @staticmethod
     def _is_listtype(x):
-        if isinstance(x, (list, tuple)):
-            return True
-        else:
-            return False
+        return isinstance(x, (list, tuple, np.ndarray))
+
+    @staticmethod
+    def _as_file_list(file_names):
+        """Returns file_names as a list (wrapping a single file name or None)."""
+        if file_names is None or isinstance(file_names, (str, bytes, os.PathLike)):
+            return [file_names]
+        return list(file_names)
 
     @staticmethod
     def _check_file_type(filename):
         warnings.warn(DeprecationWarning("this method will be removed " "in v.0.4.0"))
-        extension = os.path.splitext(filename)[-1]
-        filetype = "res"
-        if extension.lower() == ".res":
-            filetype = "res"
-        elif extension.lower() == ".h5":
-            filetype = "h5"
-        return filetype
+        extension = os.path.splitext(filename)[-1].lower()
+        if extension in CELLPY_FILE_EXTENSIONS:
+            return "h5"
+        return "res"
 
     @staticmethod
     def _bounds(x):
@@ -4269,6 +4520,8 @@ class CellpyData(object):
             # need to reverse
             x = self._reverse(x)
             y = self._reverse(y)
+        from scipy import interpolate
+
         f = interpolate.interp1d(y, x)
         y_new = f(points)
         return y_new
@@ -4279,19 +4532,28 @@ class CellpyData(object):
 
         c_txt = self.headers_normal.cycle_index_txt
         d_txt = self.headers_normal.data_point_txt
-        steps = []
-        unique_steps = raw[c_txt].unique()
-        max_step = max(raw[c_txt])
-        for j in range(int(max_step)):
-            if j + 1 not in unique_steps:
-                self.logger.debug(f"Warning: Cycle {j + 1} is missing!")
-            else:
-                last_item = max(raw.loc[raw[c_txt] == j + 1, d_txt])
-                steps.append(last_item)
+        # the last data point of every cycle (1, 2, ..., max) in one groupby
+        last_points = raw.groupby(c_txt, sort=False)[d_txt].max()
+        cycle_numbers = np.arange(1, int(last_points.index.max()) + 1)
+        found = np.isin(cycle_numbers, last_points.index)
+        for cycle in cycle_numbers[~found]:
+            self.logger.debug(f"Warning: Cycle {cycle} is missing!")
+        steps = last_points[np.isin(last_points.index, cycle_numbers)].values
 
         last_items = raw[d_txt].isin(steps)
         return last_items
 
+    def _step_boundary_values(self, raw, column, keep="first"):
+        # this function gives a dictionary with the first (or last) value
+        # of the column within each (cycle, step) pair, found in one pass
+        # instead of masking the raw data for every cycle
+
+        c_txt = self.headers_normal.cycle_index_txt
+        s_txt = self.headers_normal.step_index_txt
+        boundaries = raw.drop_duplicates([c_txt, s_txt], keep=keep)
+        keys = zip(boundaries[c_txt].tolist(), boundaries[s_txt].tolist())
+        return dict(zip(keys, boundaries[column].values))
+
     # TODO: find out what this is for and probably delete it
     def _modify_cycle_number_using_cycle_step(
         self, from_tuple=None, to_cycle=44, dataset_number=None
@@ -4315,17 +4577,19 @@ class CellpyData(object):
         step_table_txt_step = self.headers_step_table.step
 
         # modifying steps
+        # (using .loc writes through to the tables, chained indexing might not)
         st = self.cells[dataset_number].steps
-        st[step_table_txt_cycle][
-            (st[step_table_txt_cycle] == from_tuple[0])
-            & (st[step_table_txt_step] == from_tuple[1])
-        ] = to_cycle
+        mask_st = (st[step_table_txt_cycle] == from_tuple[0]) & (
+            st[step_table_txt_step] == from_tuple[1]
+        )
+        st.loc[mask_st, step_table_txt_cycle] = to_cycle
         # modifying normal_table
         nt = self.cells[dataset_number].raw
-        nt[cycle_index_header][
-            (nt[cycle_index_header] == from_tuple[0])
-            & (nt[step_index_header] == from_tuple[1])
-        ] = to_cycle
+        mask_nt = (nt[cycle_index_header] == from_tuple[0]) & (
+            nt[step_index_header] == from_tuple[1]
+        )
+        nt.loc[mask_nt, cycle_index_header] = to_cycle
+        self.cells[dataset_number].reset_cache()
         # modifying summary_table
         # not implemented yet
 
@@ -4548,31 +4812,36 @@ class CellpyData(object):
         # indexes = summary.index
 
         if select_columns:
-            columns_to_keep = [charge_txt, c_txt, d_txt, dt_txt, discharge_txt, tt_txt]
-            for cn in column_names:
-                if not columns_to_keep.count(cn):
-                    summary.pop(cn)
+            columns_to_keep = {charge_txt, c_txt, d_txt, dt_txt, discharge_txt, tt_txt}
+            # (one projection, keeping the original column order)
+            summary = summary.reindex(
+                columns=[cn for cn in column_names if cn in columns_to_keep]
+            )
 
         if not use_cellpy_stat_file:
             self.logger.debug("not using cellpy statfile")
             # self.logger.debug("Values obtained from raw:")
             # self.logger.debug(summary.head(20))
 
+        # the derived columns are collected first and added to the summary
+        # in one go (instead of growing the frame one column at a time)
+        new_columns = {}
+
         # self.logger.debug("Creates summary: specific discharge ('%s')"
         #                   % discharge_title)
-        summary[discharge_title] = summary[discharge_txt] * specific_converter
+        new_columns[discharge_title] = summary[discharge_txt] * specific_converter
 
         # self.logger.debug("Creates summary: specific scharge ('%s')" %
         #                   charge_title)
-        summary[charge_title] = summary[charge_txt] * specific_converter
+        new_columns[charge_title] = summary[charge_txt] * specific_converter
 
         # self.logger.debug("Creates summary: cumulated specific charge ('%s')" %
         #                   cumdischarge_title)
-        summary[cumdischarge_title] = summary[discharge_title].cumsum()
+        new_columns[cumdischarge_title] = new_columns[discharge_title].cumsum()
 
         # self.logger.debug("Creates summary: cumulated specific charge ('%s')" %
         #                   cumcharge_title)
-        summary[cumcharge_title] = summary[charge_title].cumsum()
+        new_columns[cumcharge_title] = new_columns[charge_title].cumsum()
 
         if self.cycle_mode == "anode":
             self.logger.info(
@@ -4589,23 +4858,23 @@ class CellpyData(object):
         #                   coulomb_title)
         # self.logger.debug("100 * ('%s')/('%s)" % (_second_step_txt,
         #                                           _first_step_txt))
-        summary[coulomb_title] = (
-            100.0 * summary[_second_step_txt] / summary[_first_step_txt]
+        new_columns[coulomb_title] = (
+            100.0 * new_columns[_second_step_txt] / new_columns[_first_step_txt]
         )
 
         # self.logger.debug("Creates summary: coulombic difference ('%s')" %
         #                   coulomb_diff_title)
         # self.logger.debug("'%s') - ('%s)" % (_second_step_txt, _first_step_txt))
-        summary[coulomb_diff_title] = (
-            summary[_second_step_txt] - summary[_first_step_txt]
+        new_columns[coulomb_diff_title] = (
+            new_columns[_second_step_txt] - new_columns[_first_step_txt]
         )
 
         # self.logger.debug("Creates summary: cumulated "
         #                   f"coulombic efficiency ('{cumcoulomb_title}')")
-        summary[cumcoulomb_title] = summary[coulomb_title].cumsum()
+        new_columns[cumcoulomb_title] = new_columns[coulomb_title].cumsum()
         # self.logger.debug("Creates summary: cumulated coulombic difference "
         #                   "f('{cumcoulomb_diff_title}')")
-        summary[cumcoulomb_diff_title] = summary[coulomb_diff_title].cumsum()
+        new_columns[cumcoulomb_diff_title] = new_columns[coulomb_diff_title].cumsum()
 
         # ---------------- discharge loss ---------------------
         # Assume that both charge and discharge is defined as positive.
@@ -4613,19 +4882,18 @@ class CellpyData(object):
         # is then cap[n] - cap[n-1]. The loss is the negative of gain.
         # discharge loss = discharge_cap[n-1] - discharge_cap[n]
         # self.logger.debug("Creates summary: calculates DL")
-        summary[col_discharge_loss_title] = (
-            summary[discharge_title].shift(1) - summary[discharge_title]
-        )
+        # (diff gives cap[n] - cap[n-1] in one pass, NaN for the first cycle)
+        new_columns[col_discharge_loss_title] = -new_columns[discharge_title].diff()
 
-        summary[dcloss_cumsum_title] = summary[col_discharge_loss_title].cumsum()
+        new_columns[dcloss_cumsum_title] = new_columns[
+            col_discharge_loss_title
+        ].cumsum()
 
         # ---------------- charge loss ------------------------
         # charge loss = charge_cap[n-1] - charge_cap[n]
-        summary[col_charge_loss_title] = (
-            summary[charge_title].shift(1) - summary[charge_title]
-        )
+        new_columns[col_charge_loss_title] = -new_columns[charge_title].diff()
 
-        summary[closs_cumsum_title] = summary[col_charge_loss_title].cumsum()
+        new_columns[closs_cumsum_title] = new_columns[col_charge_loss_title].cumsum()
 
         # --------------- D.L. --------------------------------
         # NH_n: high level at cycle n. The slope NHn=f(n) is linked to SEI loss
@@ -4640,24 +4908,25 @@ class CellpyData(object):
         # NB = 20% stable (or less)
 
         n = self.daniel_number
-        cap_ref = summary.loc[summary[c_txt] == n, _first_step_txt]
+        cap_ref = new_columns[_first_step_txt][summary[c_txt] == n]
         if not cap_ref.empty:
             cap_ref = cap_ref.values[0]
 
+            before_ref = summary[c_txt] < n
             ref = (
-                summary.loc[summary[c_txt] < n, _second_step_txt].sum()
-                + summary.loc[summary[c_txt] < n, _first_step_txt].sum()
+                new_columns[_second_step_txt][before_ref].sum()
+                + new_columns[_first_step_txt][before_ref].sum()
                 + cap_ref
             )
 
-            summary[low_level_at_cycle_n_txt] = (100 / ref) * (
-                summary[_first_step_txt].cumsum() - summary[_second_step_txt].cumsum()
+            first_step_cumsum = new_columns[_first_step_txt].cumsum()
+            second_step_cumsum = new_columns[_second_step_txt].cumsum()
+            new_columns[low_level_at_cycle_n_txt] = (100 / ref) * (
+                first_step_cumsum - second_step_cumsum
             )
 
-            summary[high_level_at_cycle_n_txt] = (100 / ref) * (
-                summary[_first_step_txt]
-                + summary[_first_step_txt].cumsum()
-                - summary[_second_step_txt].cumsum()
+            new_columns[high_level_at_cycle_n_txt] = (100 / ref) * (
+                new_columns[_first_step_txt] + first_step_cumsum - second_step_cumsum
             )
         else:
             txt = "ref cycle number: %i" % n
@@ -4665,37 +4934,44 @@ class CellpyData(object):
                 "could not extract low-high levels (ref cycle " "number does not exist)"
             )
             # self.logger.info(txt)
-            summary[low_level_at_cycle_n_txt] = np.nan
-            summary[high_level_at_cycle_n_txt] = np.nan
+            new_columns[low_level_at_cycle_n_txt] = np.nan
+            new_columns[high_level_at_cycle_n_txt] = np.nan
 
         # --------------relative irreversible capacities
         #  as defined by Gauthier et al.---
+        # (the columns and their shifted versions are looked up once)
+        first_step = new_columns[_first_step_txt]
+        second_step = new_columns[_second_step_txt]
+        previous_first_step = first_step.shift(1)
+        previous_second_step = second_step.shift(1)
+
         # RIC = discharge_cap[n-1] - charge_cap[n] /  charge_cap[n-1]
-        RIC = (summary[_first_step_txt].shift(1) - summary[_second_step_txt]) / summary[
-            _second_step_txt
-        ].shift(1)
-        summary[ric_title] = RIC.cumsum()
+        RIC = (previous_first_step - second_step) / previous_second_step
+        new_columns[ric_title] = RIC.cumsum()
 
         # RIC_SEI = discharge_cap[n] - charge_cap[n-1] / charge_cap[n-1]
-        RIC_SEI = (
-            summary[_first_step_txt] - summary[_second_step_txt].shift(1)
-        ) / summary[_second_step_txt].shift(1)
-        summary[ric_sei_title] = RIC_SEI.cumsum()
+        RIC_SEI = (first_step - previous_second_step) / previous_second_step
+        new_columns[ric_sei_title] = RIC_SEI.cumsum()
 
         # RIC_disconnect = charge_cap[n-1] - charge_cap[n] / charge_cap[n-1]
-        RIC_disconnect = (
-            summary[_second_step_txt].shift(1) - summary[_second_step_txt]
-        ) / summary[_second_step_txt].shift(1)
-        summary[ric_disconnect_title] = RIC_disconnect.cumsum()
+        RIC_disconnect = (previous_second_step - second_step) / previous_second_step
+        new_columns[ric_disconnect_title] = RIC_disconnect.cumsum()
 
         # -------------- shifted capacities as defined by J. Dahn et al. -----
         # need to double check this (including checking
         # if it is valid in cathode mode).
-        individual_edge_movement = summary[_first_step_txt] - summary[_second_step_txt]
+        individual_edge_movement = first_step - second_step
 
-        summary[shifted_charge_capacity_title] = individual_edge_movement.cumsum()
-        summary[shifted_discharge_capacity_title] = (
-            summary[shifted_charge_capacity_title] + summary[_first_step_txt]
+        shifted_charge_capacity = individual_edge_movement.cumsum()
+        new_columns[shifted_charge_capacity_title] = shifted_charge_capacity
+        new_columns[shifted_discharge_capacity_title] = (
+            shifted_charge_capacity + first_step
+        )
+
+        for title in [title for title in new_columns if title in summary.columns]:
+            summary[title] = new_columns.pop(title)
+        summary = pd.concat(
+            [summary, pd.DataFrame(new_columns, index=summary.index)], axis=1
         )
 
         # if convert_date:
@@ -4735,63 +5011,39 @@ class CellpyData(object):
                 dataset_number=dataset_number,
             )
 
+            # the min and max voltage of each relaxation are looked up by cycle
+            # number for all the summary rows in one go (zero when missing)
+            only_zeros = summary[discharge_txt] * 0.0
+            summary_cycles = summary[c_txt]
+
             if do_ocv_1:
-                only_zeros = summary[discharge_txt] * 0.0
-                ocv_1_indexes = []
-                ocv_1_v_min = []
-                ocv_1_v_max = []
-                ocvcol_min = only_zeros.copy()
-                ocvcol_max = only_zeros.copy()
-
-                for j in ocv_1:
-                    cycle = j["Cycle_Index"].values[0]  # jepe fix
-                    # try to find inxed
-                    index = summary[(summary[c_txt] == cycle)].index
-                    # print cycle, index,
-                    v_min = j["Voltage"].min()  # jepe fix
-                    v_max = j["Voltage"].max()  # jepe fix
-                    # print v_min,v_max
-                    dv = v_max - v_min
-                    ocvcol_min.iloc[index] = v_min
-                    ocvcol_max.iloc[index] = v_max
+                v_mins = {j["Cycle_Index"].values[0]: j["Voltage"].min() for j in ocv_1}
+                v_maxs = {j["Cycle_Index"].values[0]: j["Voltage"].max() for j in ocv_1}
+                has_ocv = summary_cycles.isin(list(v_mins))
+                ocvcol_min = summary_cycles.map(v_mins).where(has_ocv, only_zeros)
+                ocvcol_max = summary_cycles.map(v_maxs).where(has_ocv, only_zeros)
 
                 summary.insert(0, column=ocv_1_v_min_title, value=ocvcol_min)
                 summary.insert(0, column=ocv_1_v_max_title, value=ocvcol_max)
 
             if do_ocv_2:
-                only_zeros = summary[discharge_txt] * 0.0
-                ocv_2_indexes = []
-                ocv_2_v_min = []
-                ocv_2_v_max = []
-                ocvcol_min = only_zeros.copy()
-                ocvcol_max = only_zeros.copy()
-
-                for j in ocv_2:
-                    cycle = j["Cycle_Index"].values[0]  # jepe fix
-                    # try to find inxed
-                    index = summary[(summary[c_txt] == cycle)].index
-                    v_min = j["Voltage"].min()  # jepe fix
-                    v_max = j["Voltage"].max()  # jepe fix
-                    dv = v_max - v_min
-                    ocvcol_min.iloc[index] = v_min
-                    ocvcol_max.iloc[index] = v_max
+                v_mins = {j["Cycle_Index"].values[0]: j["Voltage"].min() for j in ocv_2}
+                v_maxs = {j["Cycle_Index"].values[0]: j["Voltage"].max() for j in ocv_2}
+                has_ocv = summary_cycles.isin(list(v_mins))
+                ocvcol_min = summary_cycles.map(v_mins).where(has_ocv, only_zeros)
+                ocvcol_max = summary_cycles.map(v_maxs).where(has_ocv, only_zeros)
+
                 summary.insert(0, column=ocv_2_v_min_title, value=ocvcol_min)
                 summary.insert(0, column=ocv_2_v_max_title, value=ocvcol_max)
 
-        if find_end_voltage and not self.load_only_summary:
-            # needs to be fixed so that end-voltage also can be extracted
-            # from the summary
-            ev_t0 = time.time()
-            self.logger.debug("finding end-voltage")
-            self.logger.debug(f"dt: {time.time() - ev_t0}")
-            only_zeros_discharge = summary[discharge_txt] * 0.0
-            only_zeros_charge = summary[charge_txt] * 0.0
+        if (find_end_voltage or find_ir) and not self.load_only_summary:
+            # the step numbers for all cycles are looked up once and used both
+            # for the end-voltages and the ir
             if not dataset.discharge_steps:
                 self.logger.debug("need to collect discharge steps")
                 discharge_steps = self.get_step_numbers(
                     steptype="discharge", allctypes=False, dataset_number=dataset_number
                 )
-                self.logger.debug(f"dt: {time.time() - ev_t0}")
             else:
                 discharge_steps = dataset.discharge_steps
                 self.logger.debug("  already have discharge_steps")
@@ -4800,11 +5052,18 @@ class CellpyData(object):
                 charge_steps = self.get_step_numbers(
                     steptype="charge", allctypes=False, dataset_number=dataset_number
                 )
-                self.logger.debug(f"dt: {time.time() - ev_t0}")
             else:
                 charge_steps = dataset.charge_steps
                 self.logger.debug("  already have charge_steps")
 
+        if find_end_voltage and not self.load_only_summary:
+            # needs to be fixed so that end-voltage also can be extracted
+            # from the summary
+            ev_t0 = time.time()
+            self.logger.debug("finding end-voltage")
+            only_zeros_discharge = summary[discharge_txt] * 0.0
+            only_zeros_charge = summary[charge_txt] * 0.0
+
             endv_indexes = []
             endv_values_dc = []
             endv_values_c = []
@@ -4814,37 +5073,25 @@ class CellpyData(object):
             # self.logger.debug(charge_steps)
             # self.logger.debug("Using the following dischargesteps")
             # self.logger.debug(discharge_steps)
+            # last voltage of every (cycle, step) pair, found in one pass
+            last_voltages = self._step_boundary_values(
+                raw, voltage_header, keep="last"
+            )
             self.logger.debug("starting iterating through the index")
-            for i in summary.index:
-                # txt = "index in summary.index: %i" % i
-                # self.logger.debug(txt)
-                # selecting the appropriate cycle
-                cycle = summary.iloc[i][c_txt]
-                # txt = "cycle: %i" % cycle
-                # self.logger.debug(txt)
+            for i, cycle in zip(summary.index, summary[c_txt].values):
                 step = discharge_steps[cycle]
 
                 # finding end voltage for discharge
                 if step[-1]:  # selecting last
-                    # TODO: @jepe - use pd.loc[row,column]
-                    # for col or pd.loc[(pd.["step"]==1),"x"]
-                    end_voltage_dc = raw[
-                        (raw[c_txt] == cycle) & (dataset.raw[s_txt] == step[-1])
-                    ][voltage_header]
                     # This will not work if there are more than one item in step
-                    end_voltage_dc = end_voltage_dc.values[-1]  # selecting
-                    # last (could also select amax)
+                    end_voltage_dc = last_voltages[(cycle, step[-1])]
                 else:
                     end_voltage_dc = 0  # could also use numpy.nan
 
                 # finding end voltage for charge
                 step2 = charge_steps[cycle]
                 if step2[-1]:
-                    end_voltage_c = raw[
-                        (raw[c_txt] == cycle) & (dataset.raw[s_txt] == step2[-1])
-                    ][voltage_header]
-                    end_voltage_c = end_voltage_c.values[-1]
-                    # end_voltage_c = np.amax(end_voltage_c)
+                    end_voltage_c = last_voltages[(cycle, step2[-1])]
                 else:
                     end_voltage_c = 0
                 endv_indexes.append(i)
@@ -4865,24 +5112,7 @@ class CellpyData(object):
             # This only picks out the data on the last IR step before
             self.logger.debug("finding ir")
             only_zeros = summary[discharge_txt] * 0.0
-            if not dataset.discharge_steps:
-                discharge_steps = self.get_step_numbers(
-                    steptype="discharge", allctypes=False, dataset_number=dataset_number
-                )
-            else:
-                discharge_steps = dataset.discharge_steps
-                self.logger.debug("  already have discharge_steps")
-            if not dataset.charge_steps:
-                charge_steps = self.get_step_numbers(
-                    steptype="charge", allctypes=False, dataset_number=dataset_number
-                )
-            else:
-                charge_steps = dataset.charge_steps
-                self.logger.debug("  already have charge_steps")
 
-            ir_indexes = []
-            ir_values = []
-            ir_values2 = []
             # self.logger.debug("trying to find ir for")
             # self.logger.debug(dataset.loaded_from)
             # self.logger.debug("Using the following charge_steps")
@@ -4890,33 +5120,19 @@ class CellpyData(object):
             # self.logger.debug("Using the following discharge_steps")
             # self.logger.debug(discharge_steps)
 
-            for i in summary.index:
-                # txt = "index in summary.index: %i" % i
-                # self.logger.debug(txt)
-                # selecting the appropriate cycle
-                cycle = summary.iloc[i][c_txt]  # "Cycle_Index" = i + 1
-                # txt = "cycle: %i" % cycle
-                # self.logger.debug(txt)
-                step = discharge_steps[cycle]
-                if step[0]:
-                    ir = raw.loc[
-                        (raw[c_txt] == cycle) & (dataset.raw[s_txt] == step[0]), ir_txt
-                    ]
-                    # This will not work if there are more than one item in step
-                    ir = ir.values[0]
-                else:
-                    ir = 0
-                step2 = charge_steps[cycle]
-                if step2[0]:
+            # ir at the first data point of each (cycle, step)
+            first_ir = self._step_boundary_values(raw, ir_txt, keep="first")
 
-                    ir2 = raw[(raw[c_txt] == cycle) & (dataset.raw[s_txt] == step2[0])][
-                        ir_txt
-                    ].values[0]
-                else:
-                    ir2 = 0
-                ir_indexes.append(i)
-                ir_values.append(ir)
-                ir_values2.append(ir2)
+            # (0 for cycles without the step)
+            cycles = summary[c_txt].values
+            ir_values = [
+                first_ir[(c, discharge_steps[c][0])] if discharge_steps[c][0] else 0
+                for c in cycles
+            ]
+            ir_values2 = [
+                first_ir[(c, charge_steps[c][0])] if charge_steps[c][0] else 0
+                for c in cycles
+            ]
 
             ir_frame = only_zeros + ir_values
             ir_frame2 = only_zeros + ir_values2
@@ -4986,8 +5202,10 @@ class CellpyData(object):
     def inspect_nominal_capacity(self, cycles=None):
 
         self.logger.debug("inspecting: nominal capacity")
-        print("Sorry! This method is still under development.")
-        print("Maybe you can plot your data and find the nominal capacity yourself?")
+        self.logger.info("Sorry! This method is still under development.")
+        self.logger.info(
+            "Maybe you can plot your data and find the nominal capacity yourself?"
+        )
         if cycles is None:
             cycles = [1, 2, 3]
 
@@ -4998,12 +5216,14 @@ class CellpyData(object):
                 summary[self.headers_normal.cycle_index_txt].isin(cycles),
                 self.headers_summary.discharge_capacity,
             ].mean()
-            print("All I can say for now is that the average discharge capacity")
-            print(f"for the cycles {cycles} is {nc:0.2f}")
+            self.logger.info(
+                "All I can say for now is that the average discharge capacity"
+                f" for the cycles {cycles} is {nc:0.2f}"
+            )
             nc = float(nc)
 
         except ZeroDivisionError:
-            print("zero division error")
+            self.logger.info("zero division error")
             nc = None
 
         return nc
@@ -5049,11 +5269,10 @@ def get(
             filename = Path(filename)
 
             if not filename.is_file():
-                print(f"Could not find {filename}")
-                print("Returning None")
+                logging.warning(f"Could not find {filename} - returning None")
                 return
 
-            if filename.suffix in [".h5", ".hdf5", ".cellpy", ".cpy"]:
+            if filename.suffix.lower() in CELLPY_FILE_EXTENSIONS:
                 logging.info(f"Loading cellpy-file: {filename}")
                 cellpy_instance.load(filename)
                 if mass is not None:
@@ -5071,8 +5290,7 @@ def get(
         logging.info(f"Loading raw-file: {filename}")
         cellpy_instance.from_raw(filename)
         if not cellpy_instance:
-            print("Could not load file: check log!")
-            print("Returning None")
+            logging.warning("Could not load file: check log! - returning None")
             return
 
         if mass is not None:
@@ -8,6 +8,7 @@ import datetime
 import logging
 import os
 import collections
+import stat
 import sys
 import time
 import warnings
@@ -15,7 +16,6 @@ from functools import wraps
 
 import numpy as np
 import pandas as pd
-from scipy import interpolate
 
 from cellpy.exceptions import NullData
 from cellpy.parameters import prms
@@ -39,6 +39,20 @@ HEADERS_SUMMARY = get_headers_summary()
 HEADERS_STEP_TABLE = get_headers_step_table()
 
 
+def _stat_file(filename):
+    """Return os.stat for filename, or None if it is not an existing file.
+
+    Replaces the os.path.isfile + os.stat pair (one system call instead of two).
+    """
+    try:
+        st = os.stat(filename)
+    except (OSError, ValueError):
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st
+
+
 class FileID(object):
     """class for storing information about the raw-data files.
 
@@ -59,11 +73,22 @@ class FileID(object):
 
         """
 
+    __slots__ = (
+        "name",
+        "full_name",
+        "size",
+        "last_modified",
+        "last_accessed",
+        "last_info_changed",
+        "location",
+        "_last_data_point",
+    )
+
     def __init__(self, filename=None):
         make_defaults = True
         if filename:
-            if os.path.isfile(filename):
-                fid_st = os.stat(filename)
+            fid_st = _stat_file(filename)
+            if fid_st is not None:
                 self.name = os.path.abspath(filename)
                 self.full_name = filename
                 self.size = fid_st.st_size
@@ -101,6 +126,14 @@ class FileID(object):
         txt += f"last data point: {self.last_data_point}\n"
         return txt
 
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__ if hasattr(self, k)}
+
+    def __setstate__(self, state):
+        # state is a dict (also for FileID objects pickled before using slots)
+        for key, value in state.items():
+            setattr(self, key, value)
+
     @property
     def last_data_point(self):
         # TODO: consider including a method here to find the last data point (raw data)
@@ -119,8 +152,8 @@ class FileID(object):
             filename (str): name of the file.
         """
 
-        if os.path.isfile(filename):
-            fid_st = os.stat(filename)
+        fid_st = _stat_file(filename)
+        if fid_st is not None:
             self.name = os.path.abspath(filename)
             self.full_name = filename
             self.size = fid_st.st_size
@@ -149,6 +182,170 @@ class FileID(object):
         return self.last_modified
 
 
+class FileIDTable(object):
+    """class for storing information about several raw-data files.
+
+        Column-wise alternative to a list of FileID objects. Each attribute is
+        a numpy array with one element per file, so that checking if the
+        raw-data files have changed can be done with vectorized comparisons.
+
+        Attributes:
+            names (numpy.ndarray): Filenames (dtype object).
+            sizes (numpy.ndarray): Sizes of the files (dtype int64).
+            mtimes (numpy.ndarray): Last modification times (dtype float64).
+            atimes (numpy.ndarray): Last access times (dtype float64).
+            missing (list): Filenames that could not be found.
+
+        """
+
+    # the columns of the fidtable in the cellpy-file that are needed
+    fidtable_columns = [
+        "raw_data_full_name",
+        "raw_data_size",
+        "raw_data_last_modified",
+        "raw_data_last_accessed",
+    ]
+
+    def __init__(self, names=None, sizes=None, mtimes=None, atimes=None):
+        if names is None:
+            names = []
+        n = len(names)
+        self.names = np.empty(n, dtype=object)
+        self.names[:] = names
+        self.sizes = self._as_array(sizes, n, np.int64)
+        self.mtimes = self._as_array(mtimes, n, np.float64)
+        self.atimes = self._as_array(atimes, n, np.float64)
+        self.missing = []
+
+    @staticmethod
+    def _as_array(values, n, dtype):
+        if values is None:
+            return np.zeros(n, dtype=dtype)
+        return np.asarray(values, dtype=dtype)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __str__(self):
+        txt = "\n<FileIDTable>\n"
+        for name, size, mtime in zip(self.names, self.sizes, self.mtimes):
+            txt += f"{name}: size={size} modified={mtime}\n"
+        return txt
+
+    @classmethod
+    def from_files(cls, filenames, strip_filenames=True):
+        """Create the table from a list of filenames.
+
+        The stats are collected using one os.scandir pass for each directory
+        containing several of the files instead of calling os.stat for each
+        file.
+
+        Args:
+            filenames (list of str): names of the files.
+            strip_filenames (bool): only keep the basename of the files.
+        """
+
+        directories = dict()
+        for filename in filenames:
+            if not filename:
+                continue
+            directory, basename = os.path.split(os.path.abspath(filename))
+            directories.setdefault(directory, {})[basename] = filename
+
+        stats = dict()
+        for directory, files in directories.items():
+            if len(files) < 2:
+                # reading the full directory listing does not pay off
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        filename = files.get(entry.name)
+                        if filename is not None and entry.is_file():
+                            stats[filename] = entry.stat()
+            except OSError:
+                continue
+
+        names, sizes, mtimes, atimes, missing = [], [], [], [], []
+        for filename in filenames:
+            st = stats.get(filename)
+            if st is None:
+                # single files and e.g. case-insensitive file systems
+                st = _stat_file(filename) if filename else None
+                if st is None:
+                    missing.append(filename)
+                    continue
+            names.append(os.path.basename(filename) if strip_filenames else filename)
+            sizes.append(st.st_size)
+            mtimes.append(st.st_mtime)
+            atimes.append(st.st_atime)
+
+        table = cls(names, sizes, mtimes, atimes)
+        table.missing = missing
+        return table
+
+    @classmethod
+    def from_fidtable(cls, fidtable, strip_filenames=True):
+        """Create the table from a fidtable (as stored in the cellpy-file)."""
+
+        names = fidtable["raw_data_full_name"].values
+        if strip_filenames:
+            names = [os.path.basename(name) for name in names]
+        return cls(
+            names,
+            fidtable["raw_data_size"].values,
+            fidtable["raw_data_last_modified"].values,
+            fidtable["raw_data_last_accessed"].values,
+        )
+
+    def values(self, check_on="size"):
+        """Get the values used when comparing files (as int64 array).
+
+        Args:
+            check_on (str): "size", "modified" or "accessed".
+        """
+
+        if check_on == "size":
+            values = self.sizes
+        elif check_on == "modified":
+            values = self.mtimes
+        else:
+            values = self.atimes
+        return values.astype(np.int64, copy=False)
+
+    def to_dict(self, check_on="size"):
+        """Get a dictionary with filenames as keys."""
+        return dict(zip(self.names, self.values(check_on).tolist()))
+
+    def matches(self, other, check_on="size"):
+        """Check each file against the files in another FileIDTable.
+
+        Returns:
+            numpy.ndarray of bool (one element for each file in this table).
+        """
+
+        similar = np.zeros(len(self), dtype=bool)
+        if len(self) == 0 or len(other) == 0:
+            return similar
+        order = np.argsort(other.names)
+        other_names = other.names[order]
+        other_values = other.values(check_on)[order]
+        pos = np.searchsorted(other_names, self.names).clip(0, len(other) - 1)
+        found = other_names[pos] == self.names
+        similar[found] = other_values[pos[found]] == self.values(check_on)[found]
+        return similar
+
+    def is_similar(self, other, check_on="size"):
+        """Check if all the files are equal to the files in another FileIDTable."""
+
+        if len(self) != len(other) or len(other) == 0:
+            return False
+        if np.array_equal(self.names, other.names):
+            # same files in the same order (the usual case) - no need to align
+            return np.array_equal(self.values(check_on), other.values(check_on))
+        return bool(self.matches(other, check_on).all())
+
+
 class Cell(object):
     """Object to store data for a test.
 
@@ -162,6 +359,8 @@ class Cell(object):
         dfsummary (pandas.DataFrame): contains summary of the data pr. cycle.
         step_table (pandas.DataFrame): information for each step, used for
             defining type of step (charge, discharge, etc.)
+        cache (dict): values derived from raw and steps (e.g. the highest
+            cycle number), reset when raw or steps is set.
 
     """
 
@@ -169,6 +368,7 @@ class Cell(object):
         self.logger = logging.getLogger(__name__)
         self.logger.debug("created DataSet instance")
 
+        self.cache = {}
         self.cell_no = None
         self.mass = prms.Materials["default_mass"]  # active material (in mg)
         self.tot_mass = prms.Materials["default_mass"]  # total material (in mg)
@@ -219,6 +419,34 @@ class Cell(object):
         # ready for use if implementing loading units
         # (will probably never happen).
 
+    @property
+    def raw(self):
+        """pandas.DataFrame: the experimental data points."""
+        return self._raw
+
+    @raw.setter
+    def raw(self, value):
+        self._raw = value
+        self.reset_cache()
+
+    @property
+    def steps(self):
+        """pandas.DataFrame: information for each step."""
+        return self._steps
+
+    @steps.setter
+    def steps(self, value):
+        self._steps = value
+        self.reset_cache()
+
+    def reset_cache(self):
+        """Forget the values derived from raw and steps.
+
+        This is done automatically when a new raw or steps frame is set, but
+        must be done explicitly after modifying them in place.
+        """
+        self.cache = {}
+
     @staticmethod
     def _header_str(hdr):
         txt = "\n"
@@ -357,23 +585,22 @@ def check64bit(current_system="python"):
                 return False
 
 
+_BYTE_UNITS = tuple(
+    (1 << (10 * i), suffix)
+    for i, suffix in enumerate(("b", "kB", "MB", "GB", "TB", "PB"))
+)
+
+
 def humanize_bytes(b, precision=1):
     """Return a humanized string representation of a number of b."""
 
-    abbrevs = (
-        (1 << 50, "PB"),
-        (1 << 40, "TB"),
-        (1 << 30, "GB"),
-        (1 << 20, "MB"),
-        (1 << 10, "kB"),
-        (1, "b"),
-    )
     if b == 1:
         return "1 byte"
-    for factor, suffix in abbrevs:
-        if b >= factor:
-            break
-    # return '%.*f %s' % (precision, old_div(b, factor), suffix)
+    # each suffix covers ten bits (factors of 1024)
+    idx = 0
+    if b > 0:
+        idx = min(max(int(b).bit_length() - 1, 0) // 10, len(_BYTE_UNITS) - 1)
+    factor, suffix = _BYTE_UNITS[idx]
     return "%.*f %s" % (precision, b // factor, suffix)
 
 
@@ -381,17 +608,20 @@ def xldate_as_datetime(xldate, datemode=0, option="to_datetime"):
     """Converts a xls date stamp to a more sensible format.
 
     Args:
-        xldate (str): date stamp in Excel format.
+        xldate (str, float or array-like): date stamp(s) in Excel format.
         datemode (int): 0 for 1900-based, 1 for 1904-based.
         option (str): option in ("to_datetime", "to_float", "to_string"),
             return value
 
     Returns:
-        datetime (datetime object, float, or string).
+        datetime (datetime object, float, or string). For numpy arrays and
+        pandas Series the conversion is vectorized and an array (or Series)
+        of datetime64, float or str is returned.
 
     """
 
-    # This does not work for numpy-arrays
+    if isinstance(xldate, (np.ndarray, pd.Series)):
+        return _xldate_as_datetime_array(xldate, datemode, option)
 
     if option == "to_float":
         d = (xldate - 25589) * 86400.0
@@ -411,6 +641,28 @@ def xldate_as_datetime(xldate, datemode=0, option="to_datetime"):
     return d
 
 
+def _xldate_as_datetime_array(xldate, datemode=0, option="to_datetime"):
+    values = np.asarray(xldate)
+    if not np.issubdtype(values.dtype, np.number):
+        # not xls date stamps - convert one by one (as for scalars)
+        converted = [xldate_as_datetime(x, datemode, option) for x in values]
+        d = np.empty(len(converted), dtype=object)
+        d[:] = converted
+    elif option == "to_float":
+        d = (values - 25589) * 86400.0
+    else:
+        # split in the same way as datetime.timedelta(days=...) does
+        day_fractions, days = np.modf(values + 1462 * datemode)
+        second_fractions, seconds = np.modf(day_fractions * 86400.0)
+        microseconds = days * 86400e6 + seconds * 1e6 + np.round(second_fractions * 1e6)
+        d = np.datetime64("1899-12-30", "us") + microseconds.astype("timedelta64[us]")
+        if option == "to_string":
+            d = np.char.replace(d.astype("datetime64[s]").astype(str), "T", " ")
+    if isinstance(xldate, pd.Series):
+        d = pd.Series(d, index=xldate.index, name=xldate.name)
+    return d
+
+
 def convert_to_mAhg(c, mass=1.0):
     """Converts capacity in Ah to capacity in mAh/g.
 
@@ -455,8 +707,7 @@ def collect_capacity_curves(
     charge_list = []
     cycles = kwargs.pop("cycle", None)
 
-    print(80 * "=")
-    print(cycles)
+    logging.debug(f"collecting capacity curves (cycles: {cycles})")
 
     if cycles is None:
         cycles = data.get_cycle_numbers()
@@ -547,15 +798,29 @@ def interpolate_y_on_x(
         x_min = xs.max()
         dx = -dx
 
-    bounds_error = kwargs.pop("bounds_error", False)
-    f = interpolate.interp1d(xs, ys, bounds_error=bounds_error, **kwargs)
     if new_x is None:
         if number_of_points:
             new_x = np.linspace(x_min, x_max, number_of_points)
         else:
             new_x = np.arange(x_min, x_max, dx)
 
-    new_y = f(new_x)
+    bounds_error = kwargs.pop("bounds_error", False)
+    if (
+        not kwargs
+        and not bounds_error
+        and len(xs) > 1
+        and xs.dtype == np.float64
+        and ys.dtype == np.float64
+    ):
+        # plain linear interpolation: same result as interp1d (that uses
+        # np.interp internally in this case) without building the object
+        order = np.argsort(xs, kind="mergesort")
+        new_y = np.interp(new_x, xs[order], ys[order], left=np.nan, right=np.nan)
+    else:
+        from scipy import interpolate
+
+        f = interpolate.interp1d(xs, ys, bounds_error=bounds_error, **kwargs)
+        new_y = f(new_x)
 
     new_df = pd.DataFrame({x: new_x, y: new_y})
 
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import glob
 import fnmatch
 import pathlib
@@ -71,7 +72,7 @@ def search_for_files(
     version = 0.1
     # might include searching and removing "." in extensions
     # should include extension definitions in prm file (version 0.6)
-    logging.debug(f"searching for {run_name}")
+    logging.debug("searching for %s", run_name)
 
     if reg_exp is not None:
         logging.warning("Sorry, but using reg exp is not implemented yet.")
@@ -98,17 +99,19 @@ def search_for_files(
         except AttributeError:
             file_name_format = "YYYYMMDD_[name]EEE_CC_TT_RR"
             if version >= 0.5:
-                print("Could not read file_name_format from _cellpy_prms_xxx.conf.")
-                print("Using:")
-                print("file_name_format:", file_name_format)
+                logging.info(
+                    "Could not read file_name_format from _cellpy_prms_xxx.conf."
+                )
+                logging.info("Using: file_name_format: %s", file_name_format)
                 file_format_explanation = "YYYYMMDD is date,"
                 file_format_explanation += " EEE is electrode number"
                 file_format_explanation += " CC is cell number,"
                 file_format_explanation += " TT is cell_type, RR is run number."
-                print(file_format_explanation)
+                logging.info(file_format_explanation)
 
     # check if raw_file_dir exists
-    if not os.path.isdir(raw_file_dir):
+    raw_file_dir_exists = os.path.isdir(raw_file_dir)
+    if not raw_file_dir_exists:
         warnings.warn("your raw file directory cannot be accessed!")
 
     if file_name_format.upper() == "YYYYMMDD_[NAME]EEE_CC_TT_RR":
@@ -129,7 +132,7 @@ def search_for_files(
 
         if use_pathlib_path:
             logging.debug("using pathlib.Path")
-            if os.path.isdir(raw_file_dir):
+            if raw_file_dir_exists:
                 run_files = pathlib.Path(raw_file_dir).glob(glob_text_raw)
                 if return_as_str_list:
                     run_files = [str(f.resolve()) for f in run_files]
@@ -138,34 +141,39 @@ def search_for_files(
                 run_files = []
 
         else:
-            if os.path.isdir(raw_file_dir):
+            if raw_file_dir_exists:
                 glob_text_raw_full = os.path.join(raw_file_dir, glob_text_raw)
                 run_files = glob.glob(glob_text_raw_full)
                 run_files.sort()
             else:
                 run_files = []
 
-        logging.debug(f"(dt: {(time.time() - time_00):4.2f}s)")
+        logging.debug("(dt: %4.2fs)", time.time() - time_00)
         return run_files, cellpy_file
 
     else:
         logging.debug("using cache in filefinder")
-        if os.path.isdir(raw_file_dir):
+        if raw_file_dir_exists:
             if len(cache) == 0:
-                cache = os.listdir(raw_file_dir)
+                cache = _list_files(raw_file_dir)
             run_files = [
                 os.path.join(raw_file_dir, x)
-                for x in cache
-                if fnmatch.fnmatch(x, glob_text_raw)
+                for x in fnmatch.filter(cache, glob_text_raw)
             ]
             run_files.sort()
         else:
             run_files = []
 
-        logging.debug(f"(dt: {(time.time() - time_00):4.2f}s)")
+        logging.debug("(dt: %4.2fs)", time.time() - time_00)
         return run_files, cellpy_file, cache
 
 
+def _list_files(directory):
+    """Returns the names of the files in directory (one os.scandir pass)."""
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.is_file()]
+
+
 def _find_resfiles(cellpyfile, raw_datadir, counter_min=1, counter_max=10):
     # function to find res files by locating all files of the form
     # (date-label)_(slurry-label)_(el-label)_(cell-type)_*
@@ -175,21 +183,34 @@ def _find_resfiles(cellpyfile, raw_datadir, counter_min=1, counter_max=10):
     counter_digits = 2
     res_extension = ".res"
     res_dir = raw_datadir
-    res_files = []
     cellpyfile = os.path.basename(cellpyfile)
     cellpyfile = os.path.splitext(cellpyfile)[0]
-    for j in range(counter_min, counter_max + 1):
-        look_for = "%s%s%s%s" % (
-            cellpyfile,
-            counter_sep,
-            str(j).zfill(counter_digits),
-            res_extension,
-        )
-
-        look_for = os.path.join(res_dir, look_for)
-        if os.path.isfile(look_for):
-            res_files.append(look_for)
+    prefix = cellpyfile + counter_sep
 
+    # one directory listing and one compiled pattern instead of checking
+    # each counter value (case-insensitive where the file system is)
+    flags = re.IGNORECASE if os.path.normcase("A") == "a" else 0
+    pattern = re.compile(
+        re.escape(prefix) + r"(\d+)" + re.escape(res_extension) + "$", flags
+    )
+    found = {}
+    try:
+        entries = os.scandir(res_dir)
+    except OSError:
+        return []
+    with entries:
+        for entry in entries:
+            match = pattern.match(entry.name)
+            if match is None:
+                continue
+            counter = match.group(1)
+            j = int(counter)
+            if counter != str(j).zfill(counter_digits):
+                continue
+            if counter_min <= j <= counter_max and entry.is_file():
+                found[j] = os.path.join(res_dir, entry.name)
+
+    res_files = [found[j] for j in sorted(found)]
     return res_files
 
 
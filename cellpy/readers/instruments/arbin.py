@@ -1,6 +1,7 @@
 """arbin res-type data files"""
 import os
 import sys
+import functools
 import tempfile
 import shutil
 import logging
@@ -17,6 +18,7 @@ from cellpy.readers.core import (
     check64bit,
     humanize_bytes,
     xldate_as_datetime,
+    _stat_file,
 )
 from cellpy.parameters.internal_settings import get_headers_normal
 from cellpy.readers.instruments.mixin import Loader
@@ -29,6 +31,8 @@ ALLOW_MULTI_TEST_FILE = False
 ODBC = prms._odbc
 SEARCH_FOR_ODBC_DRIVERS = prms._search_for_odbc_driver
 
+IS_64BIT_PYTHON = check64bit(current_system="python")
+
 use_subprocess = prms.Instruments.Arbin.use_subprocess
 detect_subprocess_need = prms.Instruments.Arbin.detect_subprocess_need
 
@@ -119,6 +123,42 @@ MINIMUM_SELECTION = [
     "Internal_Resistance",
 ]
 
+# Fixed dtypes for the columns in the normal table (so that pandas does
+# not have to guess). Measurements are kept as float64 since the
+# capacities and times are accumulated values that lose precision in float32.
+NORMAL_DTYPES = {
+    "Test_ID": np.int64,
+    "Data_Point": np.int64,
+    "Step_Index": np.int64,
+    "Cycle_Index": np.int64,
+    "Test_Time": np.float64,
+    "Step_Time": np.float64,
+    "DateTime": np.float64,
+    "Current": np.float64,
+    "Voltage": np.float64,
+    "Charge_Capacity": np.float64,
+    "Discharge_Capacity": np.float64,
+    "Charge_Energy": np.float64,
+    "Discharge_Energy": np.float64,
+    "Internal_Resistance": np.float64,
+    "dV/dt": np.float64,
+}
+
+# File system types (as given in /proc/mounts) of network drives
+NETWORK_FILE_SYSTEMS = {
+    "nfs",
+    "nfs4",
+    "cifs",
+    "smbfs",
+    "smb3",
+    "afs",
+    "9p",
+    "sshfs",
+    "fuse.sshfs",
+    "davfs",
+    "fuse.davfs2",
+}
+
 # Names of the tables in the .res db that is used by cellpy
 TABLE_NAMES = {
     "normal": "Channel_Normal_Table",
@@ -155,6 +195,65 @@ normal_headers_renaming_dict = {
 }
 
 
+@functools.lru_cache(maxsize=None)
+def _res_connection_template():
+    """Returns the connection string for .res files (with %s for the file name).
+
+    The driver look-up does not change while running, so it is only done once.
+    """
+    if use_ado:
+        if IS_64BIT_PYTHON:
+            return "Provider=Microsoft.ACE.OLEDB.12.0; Data Source=%s"
+        return "Provider=Microsoft.Jet.OLEDB.4.0; Data Source=%s"
+
+    if SEARCH_FOR_ODBC_DRIVERS:
+        logging.debug("Searching for odbc drivers")
+        try:
+            drivers = [
+                driver
+                for driver in dbloader.drivers()
+                if "Microsoft Access Driver" in driver
+            ]
+            logging.debug(f"Found these: {drivers}")
+            driver = drivers[0]
+
+        except IndexError as e:
+            logging.debug("Unfortunately, it seems the " "list of drivers is emtpy.")
+            logging.debug("Use driver-name from config (if existing).")
+            driver = driver_dll
+            if is_macos:
+                driver = "/usr/local/lib/libmdbodbc.dylib"
+            else:
+                if not driver:
+                    logging.warning(
+                        "Could not find any odbc-drivers suitable "
+                        "for .res-type files. "
+                        "Check out the homepage of pydobc for info on "
+                        "installing drivers\n"
+                        "One solution that might work is downloading "
+                        "the Microsoft Access database engine (in correct"
+                        " bytes (32 or 64)) "
+                        "from:\n"
+                        "https://www.microsoft.com/en-us/download/"
+                        "details.aspx?id=13255\n"
+                        "Or install mdbtools and set it up "
+                        "(check the cellpy docs for help)"
+                    )
+                else:
+                    logging.debug("Using driver dll from config file")
+                    logging.debug(f"driver dll: {driver}")
+
+        logging.debug(f"odbc constr: {driver}")
+
+    else:
+        if IS_64BIT_PYTHON:
+            driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
+        else:
+            driver = "Microsoft Access Driver (*.mdb)"
+        logging.debug("odbc constr: {}".format(driver))
+    return "Driver=%s;Dbq=%%s" % str(driver).replace("%", "%%")
+
+
 class ArbinLoader(Loader):
     """ Class for loading arbin-data from res-files."""
 
@@ -170,7 +269,7 @@ class ArbinLoader(Loader):
         # prms.Reader["limit_loaded_cycles"] = [cycle from, cycle to]
 
         self.headers_normal = get_headers_normal()
-        self.headers_global = self.get_headers_global()
+        self.headers_global = HEADERS_GLOBAL
         self.current_chunk = 0  # use this to set chunks to load
 
     @staticmethod
@@ -229,76 +328,8 @@ class ArbinLoader(Loader):
         return raw_limits
 
     def _get_res_connector(self, temp_filename):
-
-        if use_ado:
-            is64bit_python = check64bit(current_system="python")
-            if is64bit_python:
-                constr = (
-                    "Provider=Microsoft.ACE.OLEDB.12.0; Data Source=%s" % temp_filename
-                )
-            else:
-                constr = (
-                    "Provider=Microsoft.Jet.OLEDB.4.0; Data Source=%s" % temp_filename
-                )
-            return constr
-
-        if SEARCH_FOR_ODBC_DRIVERS:
-            logging.debug("Searching for odbc drivers")
-            try:
-                drivers = [
-                    driver
-                    for driver in dbloader.drivers()
-                    if "Microsoft Access Driver" in driver
-                ]
-                logging.debug(f"Found these: {drivers}")
-                driver = drivers[0]
-
-            except IndexError as e:
-                logging.debug(
-                    "Unfortunately, it seems the " "list of drivers is emtpy."
-                )
-                logging.debug("Use driver-name from config (if existing).")
-                driver = driver_dll
-                if is_macos:
-                    driver = "/usr/local/lib/libmdbodbc.dylib"
-                else:
-                    if not driver:
-                        print(
-                            "\nCould not find any odbc-drivers suitable "
-                            "for .res-type files. "
-                            "Check out the homepage of pydobc for info on "
-                            "installing drivers"
-                        )
-                        print(
-                            "One solution that might work is downloading "
-                            "the Microsoft Access database engine (in correct"
-                            " bytes (32 or 64)) "
-                            "from:\n"
-                            "https://www.microsoft.com/en-us/download/"
-                            "details.aspx?id=13255"
-                        )
-                        print(
-                            "Or install mdbtools and set it up "
-                            "(check the cellpy docs for help)"
-                        )
-                        print("\n")
-                    else:
-                        logging.debug("Using driver dll from config file")
-                        logging.debug(f"driver dll: {driver}")
-
-            self.logger.debug(f"odbc constr: {driver}")
-
-        else:
-            is64bit_python = check64bit(current_system="python")
-            if is64bit_python:
-                driver = "{Microsoft Access Driver (*.mdb, *.accdb)}"
-            else:
-                driver = "Microsoft Access Driver (*.mdb)"
-            self.logger.debug("odbc constr: {}".format(driver))
-        constr = "Driver=%s;Dbq=%s" % (driver, temp_filename)
-
+        constr = _res_connection_template() % temp_filename
         logging.debug(f"constr: {constr}")
-
         return constr
 
     def _clean_up_loadres(self, cur, conn, filename):
@@ -330,19 +361,19 @@ class ArbinLoader(Loader):
                 new_header = self.headers_normal[key]
                 columns[old_header] = new_header
 
-            data.raw.rename(index=str, columns=columns)
+            data.raw.rename(columns=columns, inplace=True)
 
         if fix_datetime:
             h_datetime = self.headers_normal.datetime_txt
             logging.debug("converting to datetime format")
-            data.raw[h_datetime] = data.raw[h_datetime].apply(
-                xldate_as_datetime, option="to_datetime"
+            data.raw[h_datetime] = xldate_as_datetime(
+                data.raw[h_datetime], option="to_datetime"
             )
 
             h_datetime = h_datetime
             if h_datetime in data.summary:
-                data.summary[h_datetime] = data.summary[h_datetime].apply(
-                    xldate_as_datetime, option="to_datetime"
+                data.summary[h_datetime] = xldate_as_datetime(
+                    data.summary[h_datetime], option="to_datetime"
                 )
 
         if set_index:
@@ -392,10 +423,12 @@ class ArbinLoader(Loader):
         cycle_txt = self.headers_normal.cycle_index_txt
 
         self.logger.debug("iterating through file: %s" % file_name)
-        if not os.path.isfile(file_name):
-            print("Missing file_\n   %s" % file_name)
+        st = _stat_file(file_name)
+        if st is None:
+            self.logger.warning("Missing file_\n   %s" % file_name)
+            st = os.stat(file_name)
 
-        filesize = os.path.getsize(file_name)
+        filesize = st.st_size
         hfilesize = humanize_bytes(filesize)
         txt = "Filesize: %i (%s)" % (filesize, hfilesize)
         self.logger.info(txt)
@@ -499,10 +532,12 @@ class ArbinLoader(Loader):
         cycle_txt = self.headers_normal.cycle_index_txt
 
         self.logger.debug("investigating file: %s" % file_name)
-        if not os.path.isfile(file_name):
-            print("Missing file_\n   %s" % file_name)
+        st = _stat_file(file_name)
+        if st is None:
+            self.logger.warning("Missing file_\n   %s" % file_name)
+            st = os.stat(file_name)
 
-        filesize = os.path.getsize(file_name)
+        filesize = st.st_size
         hfilesize = humanize_bytes(filesize)
         txt = "Filesize: %i (%s)" % (filesize, hfilesize)
         self.logger.info(txt)
@@ -577,14 +612,15 @@ class ArbinLoader(Loader):
                 self.logger.debug("reached the end")
                 break
             row_count, _ = normal_df.shape
-            steps = normal_df[self.headers_normal.step_index_txt].unique()
+            # one pass over the cycle instead of masking it once per step
+            step_info = normal_df.groupby(step_txt, sort=False)[point_txt].agg(
+                ["size", "min", "max"]
+            )
             txt = "cycle %i: %i [" % (cycle_number, row_count)
-            for step in steps:
+            for step, step_row_count, start_point, end_point in step_info.itertuples(
+                name=None
+            ):
                 self.logger.debug(" step: %i" % step)
-                step_df = normal_df.loc[normal_df[step_txt] == step]
-                step_row_count, _ = step_df.shape
-                start_point = step_df[point_txt].min()
-                end_point = step_df[point_txt].max()
                 txt += " %i-(%i)" % (step, step_row_count)
                 step_list = [cycle_number, step, step_row_count, start_point, end_point]
                 info_list.append(step_list)
@@ -684,13 +720,12 @@ class ArbinLoader(Loader):
                 conn, data.test_ID, bad_steps, data_points
             )
             # --------- read stats-data (summary-data) ---------------------
-            sql = "select * from %s where %s=%s order by %s" % (
+            sql = "select * from %s where %s=? order by %s" % (
                 table_name_stats,
                 self.headers_normal.test_id_txt,
-                data.test_ID,
                 self.headers_normal.data_point_txt,
             )
-            summary_df = pd.read_sql_query(sql, conn)
+            summary_df = pd.read_sql_query(sql, conn, params=(int(data.test_ID),))
 
             if summary_df.empty and prms.Reader.use_cellpy_stat_file:
                 txt = "\nCould not find any summary (stats-file)!"
@@ -781,7 +816,7 @@ class ArbinLoader(Loader):
                 tmp_name_global,
                 tmp_name_raw,
                 tmp_name_stats,
-                temp_filename,
+                temp_filename if temp_filename != file_name else None,
                 bad_steps,
                 data_points,
             )
@@ -834,14 +869,15 @@ class ArbinLoader(Loader):
         """
         # TODO: @jepe - insert kwargs - current chunk, only normal data, etc
 
-        if not os.path.isfile(file_name):
+        st = _stat_file(file_name)
+        if st is None:
             self.logger.info("Missing file_\n   %s" % file_name)
             return None
 
         self.logger.debug("in loader")
         self.logger.debug("filename: %s" % file_name)
 
-        filesize = os.path.getsize(file_name)
+        filesize = st.st_size
         hfilesize = humanize_bytes(filesize)
         txt = "Filesize: %i (%s)" % (filesize, hfilesize)
         self.logger.debug(txt)
@@ -855,20 +891,24 @@ class ArbinLoader(Loader):
                 humanize_bytes(prms.Instruments.Arbin.max_res_filesize),
             )
             error_message += "(edit prms.Instruments.Arbin ['max_res_filesize'])\n"
-            print(error_message)
+            self.logger.error(error_message)
             return None
 
-        temp_dir = tempfile.gettempdir()
-        temp_filename = os.path.join(temp_dir, os.path.basename(file_name))
-        shutil.copy2(file_name, temp_dir)
-        self.logger.debug("tmp file: %s" % temp_filename)
-
         use_mdbtools = False
         if use_subprocess:
             use_mdbtools = True
         if is_posix:
             use_mdbtools = True
 
+        temp_dir = tempfile.gettempdir()
+        if self._copy_needed(file_name, use_mdbtools):
+            temp_filename = os.path.join(temp_dir, os.path.basename(file_name))
+            shutil.copy2(file_name, temp_dir)
+            self.logger.debug("tmp file: %s" % temp_filename)
+        else:
+            temp_filename = file_name
+            self.logger.debug("reading the res-file directly (not copied)")
+
         if use_mdbtools:
             new_tests = self._loader_posix(
                 file_name,
@@ -895,6 +935,63 @@ class ArbinLoader(Loader):
 
         return new_tests
 
+    @staticmethod
+    def _copy_needed(file_name, use_mdbtools):
+        # The odbc drivers might lock the file, so we always work on a copy
+        # then. mdb-export only reads the file, so it is only copied if
+        # prms.Instruments.Arbin.copy_to_temp_dir is True, or if it is None
+        # and the file is on a network drive (or that can not be decided).
+        if not use_mdbtools:
+            return True
+        copy_to_temp_dir = prms.Instruments.Arbin.get("copy_to_temp_dir")
+        if copy_to_temp_dir is not None:
+            return bool(copy_to_temp_dir)
+        return ArbinLoader._is_on_network_drive(file_name) is not False
+
+    @staticmethod
+    def _is_on_network_drive(file_name):
+        # True if the file is on a network drive, False if it is on a local
+        # drive, and None if it can not be decided
+        path = os.path.abspath(file_name)
+        if os.name == "nt":
+            if path.startswith("\\\\"):  # UNC path
+                return True
+            drive = os.path.splitdrive(path)[0]
+            try:
+                import ctypes
+
+                drive_type = ctypes.windll.kernel32.GetDriveTypeW(drive + "\\")
+            except (ImportError, AttributeError, OSError):
+                return None
+            return drive_type == 4  # DRIVE_REMOTE
+        try:
+            with open("/proc/mounts") as mounts:
+                mount_lines = mounts.readlines()
+        except OSError:
+            return None
+        fs_type = ArbinLoader._file_system_type(os.path.realpath(path), mount_lines)
+        if fs_type is None:
+            return None
+        return fs_type in NETWORK_FILE_SYSTEMS
+
+    @staticmethod
+    def _file_system_type(path, mount_lines):
+        # the file system type of the (deepest) mount point containing path,
+        # mount_lines as in /proc/mounts ("device mount_point type ...")
+        fs_type = None
+        deepest = ""
+        for line in mount_lines:
+            fields = line.split()
+            if len(fields) < 3:
+                continue
+            mount_point = fields[1].replace("\\040", " ")
+            prefix = mount_point.rstrip("/") + "/"
+            contains_path = path == mount_point or path.startswith(prefix)
+            if contains_path and len(mount_point) >= len(deepest):
+                deepest = mount_point
+                fs_type = fields[2]
+        return fs_type
+
     def _create_tmp_files(
         self,
         table_name_global,
@@ -905,10 +1002,12 @@ class ArbinLoader(Loader):
     ):
         import subprocess
 
-        # creating tmp-filenames
-        temp_csv_filename_global = os.path.join(temp_dir, "global_tmp.csv")
-        temp_csv_filename_normal = os.path.join(temp_dir, "normal_tmp.csv")
-        temp_csv_filename_stats = os.path.join(temp_dir, "stats_tmp.csv")
+        # creating tmp-filenames (one set per res-file, so that several files
+        # can be exported at the same time)
+        prefix = os.path.splitext(os.path.basename(temp_filename))[0]
+        temp_csv_filename_global = os.path.join(temp_dir, f"{prefix}_global_tmp.csv")
+        temp_csv_filename_normal = os.path.join(temp_dir, f"{prefix}_normal_tmp.csv")
+        temp_csv_filename_stats = os.path.join(temp_dir, f"{prefix}_stats_tmp.csv")
         # making the cmds
         mdb_prms = [
             (table_name_global, temp_csv_filename_global),
@@ -955,14 +1054,26 @@ class ArbinLoader(Loader):
         # should include a more efficient to load the csv (maybe a loop where
         #   we load only chuncks and only keep the parts that fullfill the
         #   filters (e.g. bad_steps, data_points,...)
-        normal_df = pd.read_csv(temp_csv_filename_normal)
+        # (the integer columns are cast afterwards, as for the odbc loader,
+        # since read_csv fails on integer columns with missing values)
+        float_dtypes = {
+            col: dtype
+            for col, dtype in NORMAL_DTYPES.items()
+            if not np.issubdtype(dtype, np.integer)
+        }
+        normal_df = pd.read_csv(temp_csv_filename_normal, dtype=float_dtypes)
+        normal_df = self._set_normal_dtypes(normal_df)
         # filter on test ID
         normal_df = normal_df[
             normal_df[self.headers_normal.test_id_txt] == data.test_ID
         ]
-        # sort on data point
-        if prms._sort_if_subprocess:
-            normal_df = normal_df.sort_values(self.headers_normal.data_point_txt)
+        # sort on data point (mdb-export normally gives them in order already)
+        data_point_txt = self.headers_normal.data_point_txt
+        if (
+            prms._sort_if_subprocess
+            and not normal_df[data_point_txt].is_monotonic_increasing
+        ):
+            normal_df = normal_df.sort_values(data_point_txt, kind="mergesort")
 
         if bad_steps is not None:
             logging.debug("removing bad steps")
@@ -1006,6 +1117,15 @@ class ArbinLoader(Loader):
 
         length_of_test = normal_df.shape[0]
         summary_df = pd.read_csv(temp_csv_filename_stats)
+        # filter on test ID and sort on data point (as in the sql query
+        # used when loading through odbc)
+        if not summary_df.empty:
+            summary_df = summary_df[
+                summary_df[self.headers_normal.test_id_txt] == data.test_ID
+            ]
+            summary_df = summary_df.sort_values(
+                self.headers_normal.data_point_txt, kind="mergesort"
+            ).reset_index(drop=True)
 
         # clean up
         for f in [
@@ -1014,7 +1134,7 @@ class ArbinLoader(Loader):
             temp_csv_filename_normal,
             temp_csv_filename_global,
         ]:
-            if os.path.isfile(f):
+            if f is not None and os.path.isfile(f):
                 try:
                     os.remove(f)
                 except WindowsError as e:
@@ -1050,6 +1170,21 @@ class ArbinLoader(Loader):
     def _normal_table_generator(self, **kwargs):
         pass
 
+    def _set_normal_dtypes(self, normal_df):
+        # casts the columns of the normal table to NORMAL_DTYPES (only the
+        # columns that are present and not already of the correct type)
+        dtypes = {}
+        for col, dtype in NORMAL_DTYPES.items():
+            if col not in normal_df.columns or normal_df[col].dtype == dtype:
+                continue
+            if np.issubdtype(dtype, np.integer) and normal_df[col].isnull().any():
+                self.logger.debug(f"{col} contains missing values - not casting")
+                continue
+            dtypes[col] = dtype
+        if dtypes:
+            normal_df = normal_df.astype(dtypes, copy=False)
+        return normal_df
+
     def _load_res_normal_table(self, conn, test_ID, bad_steps, data_points):
         self.logger.debug("starting loading raw-data")
         self.logger.debug(f"connection: {conn} test-ID: {test_ID}")
@@ -1068,7 +1203,9 @@ class ArbinLoader(Loader):
 
         sql_1 = "select %s " % columns_txt
         sql_2 = "from %s " % table_name_normal
-        sql_3 = "where %s=%s " % (self.headers_normal.test_id_txt, test_ID)
+        # the test ID is passed as a parameter to the query
+        sql_3 = "where %s=? " % self.headers_normal.test_id_txt
+        sql_params = (int(test_ID),)
         sql_4 = ""
 
         if bad_steps is not None:
@@ -1111,7 +1248,7 @@ class ArbinLoader(Loader):
         sql = sql_1 + sql_2 + sql_3 + sql_4 + sql_5
 
         self.logger.debug("INFO ABOUT LOAD RES NORMAL")
-        self.logger.debug("sql statement: %s" % sql)
+        self.logger.debug("sql statement: %s (params: %s)" % (sql, sql_params))
 
         if DEBUG_MODE:
             current_memory_usage = sys.getsizeof(self)
@@ -1119,7 +1256,8 @@ class ArbinLoader(Loader):
         if not prms.Instruments.Arbin.chunk_size:
             self.logger.debug("no chunk-size given")
             # memory here
-            normal_df = pd.read_sql_query(sql, conn)
+            normal_df = pd.read_sql_query(sql, conn, params=sql_params)
+            normal_df = self._set_normal_dtypes(normal_df)
             # memory here
             length_of_test = normal_df.shape[0]
             self.logger.debug(f"loaded to normal_df (length =  {length_of_test})")
@@ -1127,47 +1265,56 @@ class ArbinLoader(Loader):
             self.logger.debug(f"chunk-size: {prms.Instruments.Arbin.chunk_size}")
             self.logger.debug("creating a pd.read_sql_query generator")
             normal_df_reader = pd.read_sql_query(
-                sql, conn, chunksize=prms.Instruments.Arbin.chunk_size
+                sql,
+                conn,
+                params=sql_params,
+                chunksize=prms.Instruments.Arbin.chunk_size,
             )
-            normal_df = None
-            chunk_number = 0
+            # the chunks are collected and concatenated once (concatenating
+            # for each new chunk copies all the previous rows every time)
+            chunks = []
+            max_chunks = prms.Instruments.Arbin.max_chunks
             self.logger.debug("created pandas sql reader")
             self.logger.debug("iterating chunk-wise")
-            for i, chunk in enumerate(normal_df_reader):
-                self.logger.debug(f"iteration number {i}")
-                if prms.Instruments.Arbin.max_chunks:
-                    self.logger.debug(
-                        f"max number of chunks mode "
-                        f"({prms.Instruments.Arbin.max_chunks})"
-                    )
-                    if chunk_number < prms.Instruments.Arbin.max_chunks:
-                        normal_df = pd.concat([normal_df, chunk], ignore_index=True)
-                        self.logger.debug(
-                            f"chunk {i} of {prms.Instruments.Arbin.max_chunks}"
-                        )
+            try:
+                for chunk_number, chunk in enumerate(normal_df_reader):
+                    if max_chunks:
+                        if chunk_number >= max_chunks:
+                            break
+                        self.logger.debug(f"chunk {chunk_number} of {max_chunks}")
                     else:
-                        break
-                else:
-                    try:
-                        normal_df = pd.concat([normal_df, chunk], ignore_index=True)
-                        self.logger.debug("concatenated new chunk")
-                    except MemoryError:
-                        self.logger.error(
-                            " - Could not read complete file (MemoryError)."
-                        )
-                        self.logger.error(
-                            f"Last successfully loaded chunk " f"number: {chunk_number}"
-                        )
-                        self.logger.error(
-                            f"Chunk size: {prms.Instruments.Arbin.chunk_size}"
-                        )
-                        break
-                chunk_number += 1
+                        self.logger.debug(f"iteration number {chunk_number}")
+                    chunks.append(chunk)
+            except MemoryError:
+                self.logger.error(" - Could not read complete file (MemoryError).")
+                self.logger.error(
+                    f"Last successfully loaded chunk number: {len(chunks) - 1}"
+                )
+                self.logger.error(f"Chunk size: {prms.Instruments.Arbin.chunk_size}")
+            # (concatenating needs room for a copy of all the rows - if that
+            # fails, the last chunks are dropped until the rest fits, keeping
+            # as much of the data as possible)
+            while chunks:
+                try:
+                    normal_df = pd.concat(chunks, ignore_index=True)
+                    break
+                except MemoryError:
+                    self.logger.error(" - Could not combine the chunks (MemoryError).")
+                    chunks.pop()
+                    self.logger.error(f"Dropped chunk number: {len(chunks)}")
+            else:
+                normal_df = pd.DataFrame()
+            del chunks
+            normal_df = self._set_normal_dtypes(normal_df)
             length_of_test = normal_df.shape[0]
             self.logger.debug(f"finished iterating (#rows: {length_of_test})")
         return length_of_test, normal_df
 
 
+# built once (the headers do not change between ArbinLoader instances)
+HEADERS_GLOBAL = ArbinLoader.get_headers_global()
+
+
 if __name__ == "__main__":
     import logging
     from cellpy import log
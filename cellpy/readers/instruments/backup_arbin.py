@@ -336,14 +336,14 @@ class ArbinLoader(Loader):
         if fix_datetime:
             h_datetime = self.headers_normal.datetime_txt
             logging.debug("converting to datetime format")
-            data.raw[h_datetime] = data.raw[h_datetime].apply(
-                xldate_as_datetime, option="to_datetime"
+            data.raw[h_datetime] = xldate_as_datetime(
+                data.raw[h_datetime], option="to_datetime"
             )
 
             h_datetime = h_datetime
             if h_datetime in data.summary:
-                data.summary[h_datetime] = data.summary[h_datetime].apply(
-                    xldate_as_datetime, option="to_datetime"
+                data.summary[h_datetime] = xldate_as_datetime(
+                    data.summary[h_datetime], option="to_datetime"
                 )
 
         if set_index:
@@ -7,7 +7,6 @@ import shutil
 import logging
 import warnings
 import time
-from collections import OrderedDict
 import datetime
 import pandas as pd
 import numpy as np
@@ -19,7 +18,13 @@ from cellpy.readers.instruments.biologic_file_format import (
     bl_log_pos_dtype,
     bl_flags,
 )
-from cellpy.readers.core import FileID, Cell, check64bit, humanize_bytes
+from cellpy.readers.core import (
+    FileID,
+    Cell,
+    check64bit,
+    humanize_bytes,
+    _stat_file,
+)
 from cellpy.parameters.internal_settings import get_headers_normal
 from cellpy.readers.instruments.mixin import Loader
 from cellpy.parameters import prms
@@ -189,11 +194,12 @@ class MprLoader(Loader):
             new_tests (list of data objects)
         """
         new_tests = []
-        if not os.path.isfile(file_name):
+        st = _stat_file(file_name)
+        if st is None:
             self.logger.info("Missing file_\n   %s" % file_name)
             return None
 
-        filesize = os.path.getsize(file_name)
+        filesize = st.st_size
         hfilesize = humanize_bytes(filesize)
         txt = "Filesize: %i (%s)" % (filesize, hfilesize)
         self.logger.debug(txt)
@@ -372,8 +378,8 @@ class MprLoader(Loader):
             self.logger.debug("UPS! you have some columns left")
             self.logger.debug(whats_left)
 
-        dtype_dict = OrderedDict()
-        flags_dict = OrderedDict()
+        dtype_dict = dict()
+        flags_dict = dict()
 
         for col in column_types:
             if col in bl_flags.keys():
@@ -436,20 +442,20 @@ class MprLoader(Loader):
     def _generate_cycle_index(self):
         flag = "Ns changes"
         n = self._get_flag(flag)
-        self.mpr_data[self.cellpy_headers["cycle_index_txt"]] = 1
-        ns_changes = self.mpr_data[n].index.values
-        for i in ns_changes:
-            self.mpr_data.loc[i:, self.cellpy_headers["cycle_index_txt"]] += 1
+        # the cycle number increases by one at each "Ns changes" flag
+        self.mpr_data[self.cellpy_headers["cycle_index_txt"]] = 1 + np.cumsum(
+            n, dtype=np.int64
+        )
 
     def _generate_datetime(self):
         start_date = self.mpr_settings["start_date"]
         start_datetime = self.mpr_log["Start"]
         cellpy_header_txt = "datetime_txt"
         date_format = "%Y-%m-%d %H:%M:%S"  # without microseconds
-        self.mpr_data[self.cellpy_headers[cellpy_header_txt]] = [
-            start_datetime + datetime.timedelta(seconds=n)
-            for n in self.mpr_data["time"].values
-        ]
+        self.mpr_data[self.cellpy_headers[cellpy_header_txt]] = (
+            pd.Timestamp(start_datetime)
+            + pd.to_timedelta(np.round(self.mpr_data["time"].values * 1e6), unit="us")
+        )
         # self.mpr_data[self.cellpy_headers[cellpy_header_txt]]
         # .start_date.strftime(date_format)
         # TODO: @jepe - currently storing as datetime object
@@ -471,13 +477,13 @@ class MprLoader(Loader):
         self.mpr_data[self.cellpy_headers["sub_step_time_txt"]] = np.nan
 
     def _generate_capacities(self):
-        cap_col = self.mpr_data["QChargeDischarge"]
-        self.mpr_data[self.cellpy_headers["discharge_capacity_txt"]] = [
-            0.0 if x < 0 else x for x in cap_col
-        ]
-        self.mpr_data[self.cellpy_headers["charge_capacity_txt"]] = [
-            0.0 if x >= 0 else x for x in cap_col
-        ]
+        cap_col = self.mpr_data["QChargeDischarge"].values.astype(np.float64)
+        self.mpr_data[self.cellpy_headers["discharge_capacity_txt"]] = np.where(
+            cap_col < 0, 0.0, cap_col
+        )
+        self.mpr_data[self.cellpy_headers["charge_capacity_txt"]] = np.where(
+            cap_col >= 0, 0.0, cap_col
+        )
 
     def _rename_headers(self):
         # should ideally use the info from bl_dtypes, will do that later
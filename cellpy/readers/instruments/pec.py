@@ -7,7 +7,7 @@ import numpy as np
 
 import pandas as pd
 
-from cellpy.readers.core import FileID, Cell, humanize_bytes
+from cellpy.readers.core import FileID, Cell, humanize_bytes, _stat_file
 from cellpy.parameters.internal_settings import get_headers_normal
 from cellpy.readers.instruments.mixin import Loader
 
@@ -102,11 +102,12 @@ class PECLoader(Loader):
 
     def loader(self, file_name, bad_steps=None, **kwargs):
         new_tests = []
-        if not os.path.isfile(file_name):
+        st = _stat_file(file_name)
+        if st is None:
             self.logger.info("Missing file_\n   %s" % file_name)
             return None
 
-        filesize = os.path.getsize(file_name)
+        filesize = st.st_size
         hfilesize = humanize_bytes(filesize)
         txt = "Filesize: %i (%s)" % (filesize, hfilesize)
         logging.debug(txt)
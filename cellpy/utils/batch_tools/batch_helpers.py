@@ -28,13 +28,14 @@ def look_up_and_get(cellpy_file_name, table_name, root=None):
     table_path = "/".join([root, table_name])
 
     logging.debug(f"look_up_and_get({cellpy_file_name}, {table_name}")
-    store = pd.HDFStore(cellpy_file_name)
+    store = pd.HDFStore(cellpy_file_name, mode="r")
     try:
         table = store.select(table_path)
     except KeyError as e:
         logging.warning("Could not read the table")
-        store.close()
         raise WrongFileVersion(e)
+    finally:
+        store.close()
     return table
 
 
@@ -77,7 +78,7 @@ def create_folder_structure(project_name, batch_name):
 def find_files(info_dict, filename_cache=None):
     # searches for the raw data files and the cellpyfile-name
     for run_name in info_dict["filenames"]:
-        logging.debug(f"checking for {run_name}")
+        logging.debug("checking for %s", run_name)
         if prms._use_filename_cache:
             raw_files, cellpyfile, filename_cache = filefinder.search_for_files(
                 run_name, cache=filename_cache
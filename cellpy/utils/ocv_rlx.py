@@ -104,6 +104,19 @@ def select_ocv_points(
     if selection_method == "martin":
         iter_range -= 1
 
+    # splitting the raw data for the selected steps in one go instead of
+    # masking the full raw data for every step
+    v_columns = ["Step_Time", "Voltage"]
+    ocv_raw = dfdata.loc[
+        dfdata["Cycle_Index"].isin(ocv_steps["cycle"].unique()),
+        ["Cycle_Index", "Step_Index"] + v_columns,
+    ]
+    ocv_raw_by_step = {
+        key: group[v_columns]
+        for key, group in ocv_raw.groupby(["Cycle_Index", "Step_Index"], sort=False)
+    }
+    empty_v_df = ocv_raw.loc[[], v_columns]
+
     # very slow:
     for index, row in ocv_steps.iterrows():
 
@@ -135,10 +148,7 @@ def select_ocv_points(
         cycle, step = (row["cycle"], row["step"])
         info = row["type"]
 
-        v_df = dfdata.loc[
-            (dfdata["Cycle_Index"] == cycle) & (dfdata["Step_Index"] == step),
-            ["Step_Time", "Voltage"],
-        ]
+        v_df = ocv_raw_by_step.get((cycle, step), empty_v_df)
 
         poi = []
 
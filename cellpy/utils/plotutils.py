@@ -519,8 +519,11 @@ def _cycle_info_plot_bokeh(
 
     # labelling cycles
     if label_cycles:
-        cycle_line_positions = [df.loc[df[h_cycle] == c, x].min() for c in cycle]
-        cycle_line_positions.append(df.loc[df[h_cycle] == cycle[-1], x].max())
+        # x-ranges for all the cycles from one groupby (in plotting order)
+        cycle_x_ranges = df.groupby(h_cycle, sort=False)[x].agg(["min", "max"])
+        cycle_x_ranges = cycle_x_ranges.reindex(cycle)
+        cycle_line_positions = cycle_x_ranges["min"].tolist()
+        cycle_line_positions.append(cycle_x_ranges["max"].iloc[-1])
         for m in cycle_line_positions:
             _s = Span(
                 location=m,
@@ -532,17 +535,9 @@ def _cycle_info_plot_bokeh(
             plot.add_layout(_s)
 
         s_y_pos = y_min + 0.9 * (y_max - y_min)
-        s_x = []
-        s_y = []
-        s_l = []
-
-        for s in cycle:
-            s_x_min = df.loc[df[h_cycle] == s, x].min()
-            s_x_max = df.loc[df[h_cycle] == s, x].max()
-            s_x_pos = (s_x_min + s_x_max) / 2
-            s_x.append(s_x_pos)
-            s_y.append(s_y_pos)
-            s_l.append(f"c{s}")
+        s_x = ((cycle_x_ranges["min"] + cycle_x_ranges["max"]) / 2).tolist()
+        s_y = [s_y_pos] * len(s_x)
+        s_l = [f"c{s}" for s in cycle]
 
         c_labels = ColumnDataSource(data={x: s_x, y: s_y, "names": s_l})
 
@@ -561,12 +556,20 @@ def _cycle_info_plot_bokeh(
 
         # labelling steps
     if label_steps:
+        # x- and y-ranges for all the (cycle, step) pairs from one groupby
+        step_ranges = df.groupby([h_cycle, h_step], sort=False).agg(
+            x_min=(x, "min"), y_min=(y, "min"), y_max=(y, "max")
+        )
+        step_ranges_by_cycle = {
+            c: ranges.droplevel(0)
+            for c, ranges in step_ranges.groupby(level=0, sort=False)
+        }
         for c in cycle:
-            step = df.loc[df[h_cycle] == c, h_step].unique()
-            step_line_positions = [
-                df.loc[(df[h_step] == s) & (df[h_cycle] == c), x].min()
-                for s in step[0:]
-            ]
+            ranges = step_ranges_by_cycle.get(c)
+            if ranges is None:
+                continue
+            step = ranges.index
+            step_line_positions = ranges["x_min"].tolist()
             for m in step_line_positions:
                 _s = Span(
                     location=m,
@@ -578,22 +581,9 @@ def _cycle_info_plot_bokeh(
                 plot.add_layout(_s)
 
             # s_y_pos = y_min + 0.8 * (y_max - y_min)
-            s_x = []
-            s_y = []
-            s_l = []
-
-            for s in step:
-                s_x_min = df.loc[(df[h_step] == s) & (df[h_cycle] == c), x].min()
-                s_x_max = df.loc[(df[h_step] == s) & (df[h_cycle] == c), x].max()
-                s_x_pos = s_x_min
-
-                s_y_min = df.loc[(df[h_step] == s) & (df[h_cycle] == c), y].min()
-                s_y_max = df.loc[(df[h_step] == s) & (df[h_cycle] == c), y].max()
-                s_y_pos = (s_y_max + s_y_min) / 2
-
-                s_x.append(s_x_pos)
-                s_y.append(s_y_pos)
-                s_l.append(f"s{s}")
+            s_x = ranges["x_min"].tolist()
+            s_y = ((ranges["y_max"] + ranges["y_min"]) / 2).tolist()
+            s_l = [f"s{s}" for s in step]
 
             s_labels = ColumnDataSource(data={x: s_x, y: s_y, "names": s_l})
 
@@ -5,6 +5,8 @@ import datetime
 import pytest
 import logging
 
+import numpy as np
+
 import cellpy.readers.core
 from cellpy.exceptions import DeprecatedFeature
 from cellpy import log, prms
@@ -65,6 +67,35 @@ def test_xldate_as_datetime(xldate, datemode, option, expected):
     assert result == expected
 
 
+@pytest.mark.parametrize("option", ["to_datetime", "to_float", "to_string"])
+def test_xldate_as_datetime_array(option):
+    xldates = np.array([0.0, 100.0, 42000.5, 43000.123456789])
+    expected = [
+        cellpy.readers.core.xldate_as_datetime(x, 0, option) for x in xldates
+    ]
+    result = cellpy.readers.core.xldate_as_datetime(xldates, 0, option)
+    if option == "to_datetime":
+        result = result.astype(datetime.datetime)
+    assert list(result) == expected
+
+
+@pytest.mark.parametrize(
+    "x, expected",
+    [
+        ([1, 2], True),
+        ((1, 2), True),
+        (np.array([1, 2]), True),
+        ("file.res", False),
+        (1, False),
+        (None, False),
+    ],
+)
+def test_is_listtype(x, expected):
+    from cellpy import cellreader
+
+    assert cellreader.CellpyData._is_listtype(x) is expected
+
+
 def test_raw_bad_data_cycle_and_step(cellpy_data_instance):
     cycle = 5
     step = 10
@@ -148,6 +179,146 @@ def test_merge(cellpy_data_instance):
     assert pytest.approx(count_all, 0.001) == (count_first + count_second)
 
 
+def test_append_many():
+    import collections
+    import pandas as pd
+    from cellpy import cellreader
+
+    def load_cells(n):
+        cells = []
+        for i in range(n):
+            c = cellreader.CellpyData()
+            c.load(fdv.cellpy_file_path)
+            c.cell.steps = collections.OrderedDict()
+            c.cell.start_datetime += i
+            cells.append(c.cell)
+        return c, cells
+
+    c, cells = load_cells(3)
+    expected = cells[0]
+    for cell in cells[1:]:
+        expected = c._append(expected, cell, merge_step_table=False)
+
+    c, cells = load_cells(3)
+    merged = c._append_many(cells[0], cells[1:])
+    pd.testing.assert_frame_equal(merged.raw, expected.raw)
+    pd.testing.assert_frame_equal(merged.summary, expected.summary)
+    assert merged.no_cycles == expected.no_cycles
+    assert merged.merged
+
+
+def test_load_raw_files_using_threads(monkeypatch):
+    import time
+    from cellpy import cellreader, prms
+
+    c = cellreader.CellpyData()
+
+    def loader(file_name, **kwargs):
+        time.sleep(0.01 * (3 - file_name))
+        return [file_name, kwargs]
+
+    files = [0, 1, 2]
+    expected = list(c._load_raw_files(loader, files, a=1))
+    monkeypatch.setattr(prms.Reader, "raw_load_workers", 3)
+    assert list(c._load_raw_files(loader, files, a=1)) == expected
+    assert expected == [[0, {"a": 1}], [1, {"a": 1}], [2, {"a": 1}]]
+
+
+def test_from_raw_skips_empty_files(caplog):
+    import collections
+    from cellpy import cellreader
+    from cellpy.readers.core import Cell
+
+    def loader(file_name, **kwargs):
+        if file_name == "empty.res":
+            cell = Cell()
+        else:
+            cell = cellreader.CellpyData().load(fdv.cellpy_file_path).cell
+            cell.steps = collections.OrderedDict()
+        cell.raw_data_files = [file_name]
+        cell.raw_data_files_length = [len(cell.raw)]
+        return [cell]
+
+    c = cellreader.CellpyData()
+    c.loader = loader
+    c.from_raw(["first.res", "empty.res", "last.res"])
+    assert c.cell.raw_data_files == ["first.res", "last.res"]
+    assert c.cell.merged
+    assert "EMPTY TEST: empty.res" in caplog.text
+
+    c = cellreader.CellpyData()
+    c.loader = loader
+    c.from_raw(["first.res", "empty.res"])
+    assert c.cell.raw_data_files == ["first.res"]
+    assert not c.cell.merged
+    cell = c._append_many(c.cell, loader("empty.res"))
+    assert not cell.merged
+
+
+def test_arbin_chunked_load_keeps_data_on_memory_error(monkeypatch):
+    import sqlite3
+    import pandas as pd
+    from cellpy import prms
+    from cellpy.readers.instruments import arbin
+
+    conn = sqlite3.connect(":memory:")
+    normal_df = pd.DataFrame({"Test_ID": 1, "Data_Point": range(1, 11), "Voltage": 3.0})
+    normal_df.to_sql(arbin.TABLE_NAMES["normal"], conn, index=False)
+    monkeypatch.setattr(prms.Instruments.Arbin, "chunk_size", 2)
+
+    concat = pd.concat
+
+    def concat_at_most_three(objs, **kwargs):
+        if len(objs) > 3:
+            raise MemoryError
+        return concat(objs, **kwargs)
+
+    monkeypatch.setattr(pd, "concat", concat_at_most_three)
+    loader = arbin.ArbinLoader()
+    length, loaded = loader._load_res_normal_table(conn, 1, None, None)
+    conn.close()
+    assert length == 6
+    assert list(loaded["Data_Point"]) == [1, 2, 3, 4, 5, 6]
+
+
+@pytest.mark.parametrize(
+    "use_mdbtools, copy_to_temp_dir, on_network_drive, expected",
+    [
+        (False, False, False, True),
+        (True, True, False, True),
+        (True, False, True, False),
+        (True, None, True, True),
+        (True, None, None, True),
+        (True, None, False, False),
+    ],
+)
+def test_arbin_copy_needed(
+    monkeypatch, use_mdbtools, copy_to_temp_dir, on_network_drive, expected
+):
+    from cellpy import prms
+    from cellpy.readers.instruments.arbin import ArbinLoader
+
+    monkeypatch.setitem(prms.Instruments.Arbin, "copy_to_temp_dir", copy_to_temp_dir)
+    monkeypatch.setattr(
+        ArbinLoader, "_is_on_network_drive", staticmethod(lambda f: on_network_drive)
+    )
+    assert ArbinLoader._copy_needed("file.res", use_mdbtools) is expected
+
+
+def test_arbin_file_system_type():
+    from cellpy.readers.instruments.arbin import ArbinLoader
+
+    mount_lines = [
+        "/dev/sda1 / ext4 rw 0 0\n",
+        "server:/data /mnt/data nfs4 rw 0 0\n",
+        "tmpfs /tmp tmpfs rw 0 0\n",
+    ]
+    file_system_type = ArbinLoader._file_system_type
+    assert file_system_type("/mnt/data/cell.res", mount_lines) == "nfs4"
+    assert file_system_type("/mnt/database/cell.res", mount_lines) == "ext4"
+    assert file_system_type("/home/cell.res", mount_lines) == "ext4"
+
+
 def test_merge_auto_from_list():
     from cellpy import cellreader
 
@@ -194,6 +365,106 @@ def test_validate_step_table(dataset):
     assert validated
 
 
+def test_cached_values_follow_raw_and_steps():
+    from cellpy import cellreader
+
+    # (not using the dataset fixture, since the data are modified here)
+    c = cellreader.CellpyData()
+    c.load(fdv.cellpy_file_path)
+    c_txt = c.headers_normal.cycle_index_txt
+    s_txt = c.headers_normal.step_index_txt
+    n = c.get_number_of_cycles()
+    cycles = c.get_cycle_numbers()
+    cycles[0] = -1
+    assert c.get_cycle_numbers()[0] != -1
+    step = c.cell.raw.loc[c.cell.raw[c_txt] == 2, s_txt].iloc[0]
+    c._select_step(2, step)
+    assert c._validate_step_table()
+
+    # a new raw frame of the same length (with the rows in reverse order)
+    raw = c.cell.raw.iloc[::-1].reset_index(drop=True)
+    raw[c_txt] += 1
+    c.cell.raw = raw
+    assert c.get_number_of_cycles() == n + 1
+    assert min(c.get_cycle_numbers()) == 2
+    assert not c._validate_step_table()
+    expected = raw[(raw[c_txt] == 3) & (raw[s_txt] == step)]
+    assert c._select_step(3, step).index.tolist() == expected.index.tolist()
+
+    # modified in place (and the cache reset explicitly)
+    c.cell.raw[c_txt] += 1
+    c.cell.reset_cache()
+    assert c.get_number_of_cycles() == n + 2
+    assert min(c.get_cycle_numbers()) == 3
+
+    # a new step table
+    charge_steps = c.get_step_numbers("charge", cycle_number=2)[2]
+    steps = c.cell.steps.copy()
+    steps[c.headers_step_table.cycle] += 10
+    c.cell.steps = steps
+    assert c.get_step_numbers("charge", cycle_number=12)[12] == charge_steps
+    c.make_step_table()
+    assert c._validate_step_table()
+
+
+def test_modify_cycle_number_using_cycle_step():
+    from cellpy import cellreader
+
+    # (not using the dataset fixture, since the data are modified here)
+    c = cellreader.CellpyData()
+    c.load(fdv.cellpy_file_path)
+    h = c.headers_normal
+    raw = c.cell.raw
+    step = raw.loc[raw[h.cycle_index_txt] == 2, h.step_index_txt].iloc[0]
+    c._modify_cycle_number_using_cycle_step(from_tuple=[2, step], to_cycle=44)
+    assert (c.cell.raw[h.cycle_index_txt] == 44).any()
+    assert (c.cell.steps[c.headers_step_table.cycle] == 44).any()
+    assert c.get_number_of_cycles() == 44
+
+
+def test_aggregate_steps_first_and_last():
+    import pandas as pd
+    from cellpy import cellreader
+
+    df = pd.DataFrame(
+        {
+            "cycle": [2, 1, 2, 1, 1, np.nan, 2],
+            "step": [1, 1, 1, 2, 2, 1, 1],
+            "voltage": [np.nan, 1.0, 3.0, 0.0, 5.0, 7.0, 4.0],
+            "point": [1, 2, 3, 4, 5, 6, 7],
+        }
+    )
+    gf = df.groupby(["cycle", "step"])
+    df_steps = cellreader.CellpyData._aggregate_steps(gf, ["voltage", "point"])
+
+    # (as found with the python functions previously given to agg)
+    def delta(x):
+        if x.iloc[0] == 0.0:
+            return 100.0 * x.iloc[-1]
+        return (x.iloc[-1] - x.iloc[0]) * 100 / abs(x.iloc[0])
+
+    for col in ["voltage", "point"]:
+        expected = gf[col].agg([lambda x: x.iloc[0], lambda x: x.iloc[-1], delta])
+        expected.columns = ["first", "last", "delta"]
+        for name in expected.columns:
+            # (agg cast the deltas back to int when they happened to be whole)
+            pd.testing.assert_series_equal(
+                df_steps[(col, name)],
+                expected[name],
+                check_names=False,
+                check_dtype=name != "delta",
+            )
+
+
+def test_percentage_change():
+    from cellpy import cellreader
+
+    first = np.array([2.0, -2.0, 0.0, np.nan])
+    last = np.array([3.0, -1.0, 0.5, 1.0])
+    change = cellreader.CellpyData._percentage_change(first, last)
+    np.testing.assert_allclose(change, [50.0, 50.0, 50.0, np.nan])
+
+
 def test_print_step_table(dataset):
     dataset.print_steps()
 
@@ -610,6 +881,27 @@ def test_save_cellpyfile_auto_extension(cellpy_data_instance):
     assert not os.path.isfile(tmp_file + ".h5")
 
 
+def test_save_and_load_cellpyfile_without_raw_files(cellpy_data_instance):
+    import warnings
+    from cellpy import cellreader
+
+    cellpy_data_instance.load(fdv.cellpy_file_path)
+    cellpy_data_instance.cell.raw_data_files = []
+    cellpy_data_instance.cell.raw_data_files_length = []
+    tmp_file = next(tempfile._get_candidate_names()) + ".h5"
+    cellpy_data_instance.save(tmp_file)
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            c = cellreader.CellpyData()
+            c.load(tmp_file)
+    finally:
+        os.remove(tmp_file)
+    assert not [w for w in caught if "fid_table" in str(w.message)]
+    assert c.cell.raw_data_files == []
+    assert len(c.cell.raw) == len(cellpy_data_instance.cell.raw)
+
+
 def test_save_cvs(cellpy_data_instance):
     cellpy_data_instance.loadcell(fdv.res_file_path)
     cellpy_data_instance.make_summary(find_ir=True)
@@ -623,6 +915,25 @@ def test_save_cvs(cellpy_data_instance):
     # assert not os.path.isfile(tmp_file)
 
 
+def test_save_csv_using_threads(dataset, monkeypatch, tmp_path):
+    from cellpy import prms
+
+    sequential_dir = str(tmp_path / "sequential")
+    threaded_dir = str(tmp_path / "threaded")
+    os.mkdir(sequential_dir)
+    os.mkdir(threaded_dir)
+    dataset.to_csv(datadir=sequential_dir)
+    monkeypatch.setattr(prms.Reader, "csv_export_workers", 3)
+    dataset.to_csv(datadir=threaded_dir)
+    file_names = sorted(os.listdir(sequential_dir))
+    assert file_names == sorted(os.listdir(threaded_dir))
+    for file_name in file_names:
+        with open(os.path.join(sequential_dir, file_name)) as f:
+            expected = f.read()
+        with open(os.path.join(threaded_dir, file_name)) as f:
+            assert f.read() == expected
+
+
 def test_str_cellpy_data_object(dataset):
     assert str(dataset.cell).find("silicon") >= 0
     assert str(dataset.cell).find("rosenborg") < 0
@@ -633,6 +944,53 @@ def test_check_cellpy_file(cellpy_data_instance):
     ids = cellpy_data_instance._check_cellpy_file(file_name)
 
 
+def test_file_id_table(cellpy_data_instance):
+    from cellpy.readers.core import FileIDTable
+
+    ids_one = cellpy_data_instance._check_raw(
+        [fdv.cellpy_file_path, fdv.cellpy_file_path + ".missing"]
+    )
+    assert len(ids_one) == 1
+    assert ids_one.missing == [fdv.cellpy_file_path + ".missing"]
+
+    name = os.path.basename(fdv.cellpy_file_path)
+    ids_two = FileIDTable(["other.res", name], [1, ids_one.sizes[0]])
+    assert cellpy_data_instance._compare_ids(ids_one, ids_two) is False
+    assert cellpy_data_instance._parse_ids(ids_one, ids_two) == {name: True}
+    assert cellpy_data_instance._compare_ids(ids_one, FileIDTable([name], [0])) is False
+    ids_three = FileIDTable([name], ids_one.sizes)
+    assert cellpy_data_instance._compare_ids(ids_one, ids_three) is True
+
+
+def test_file_id_pickle():
+    import pickle
+    import pandas as pd
+    from cellpy.readers.core import FileID
+
+    fid = FileID(fdv.cellpy_file_path)
+    fid.last_data_point = 10
+    fid_2 = pickle.loads(pickle.dumps(fid))
+    assert not hasattr(fid_2, "__dict__")
+    assert fid_2.size == fid.size
+    assert fid_2.last_data_point == 10
+
+    # FileID objects pickled in older cellpy-files (fixed format fidtable)
+    with pd.HDFStore(fdv.cellpy_file_path, mode="r") as store:
+        fidtable = store.select("CellpyData/fid")
+    assert fidtable["raw_data_fid"].iloc[0].size == fidtable["raw_data_size"].iloc[0]
+
+
+def test_check_cellpy_file_cached(cellpy_data_instance):
+    file_name = fdv.cellpy_file_path
+    ids_one = cellpy_data_instance._check_cellpy_file(file_name)
+    ids_two = cellpy_data_instance._check_cellpy_file(file_name)
+    assert ids_one is ids_two
+    cellpy_data_instance.clear_file_id_cache()
+    ids_three = cellpy_data_instance._check_cellpy_file(file_name)
+    assert ids_three is not ids_one
+    assert ids_three.to_dict() == ids_one.to_dict()
+
+
 def test_cellpyfile_roundtrip():
     from cellpy import cellreader
 
@@ -677,6 +1035,29 @@ def test_group_by_interpolate(dataset):
     )
 
 
+def test_interpolate_y_on_x_matches_interp1d():
+    import pandas as pd
+    from scipy import interpolate
+
+    small = pd.DataFrame(
+        {"x": [3.0, 1.0, 2.0, 2.0, 5.0], "y": [1.0, 2.0, 4.0, 3.0, 0.0]}
+    )
+    # (long enough for the sorting to not be done by insertion sort)
+    x = np.random.RandomState(42).randint(0, 10, 200).astype(float)
+    large = pd.DataFrame({"x": x, "y": np.arange(200.0)})
+    new_x = np.linspace(-1.0, 11.0, 49)
+    for df in (small, large):
+        interpolated = cellpy.readers.core.interpolate_y_on_x(
+            df, x="x", y="y", new_x=new_x
+        )
+        # (points with equal x are kept in their original order)
+        df = df.sort_values("x", kind="mergesort")
+        expected = interpolate.interp1d(
+            df.x, df.y, bounds_error=False, assume_sorted=True
+        )(new_x)
+        np.testing.assert_array_equal(interpolated["y"].values, expected)
+
+
 def test_get():
     c_h5 = cellpy.get(fdv.cellpy_file_path)
     c_res = cellpy.get(fdv.res_file_path, instrument="arbin", mass=0.045)
@@ -719,6 +1100,8 @@ def test_set_nominal_capacity(dataset, val, validated):
         (2, -1),
         ("first", 0),
         ("last", -1),
+        ("Beginning", 0),
+        ("NEWEST", -1),
         pytest.param(-1, -1, marks=pytest.mark.xfail),
     ],
 )
@@ -65,3 +65,35 @@ def test_search_for_files_using_custom_prms_file():
     raw_files, cellpy_file = filefinder.search_for_files(
         fdv.run_name, prm_filename=fdv.default_prm_file
     )
+
+
+def test_find_resfiles():
+    from cellpy.readers.filefinder import _find_resfiles
+
+    res_file_path2 = os.path.join(fdv.raw_data_dir, fdv.res_file_name2)
+
+    res_files = _find_resfiles(fdv.cellpy_file_path, fdv.raw_data_dir)
+    assert res_files == [fdv.res_file_path, res_file_path2]
+
+    res_files = _find_resfiles(fdv.cellpy_file_path, fdv.raw_data_dir, counter_min=2)
+    assert res_files == [res_file_path2]
+
+
+def test_search_for_files_using_cache():
+    cache = []
+    raw_files, cellpy_file, cache = filefinder.search_for_files(
+        fdv.run_name,
+        raw_file_dir=fdv.raw_data_dir,
+        cellpy_file_dir=fdv.output_dir,
+        cache=cache,
+    )
+    assert fdv.res_file_path in raw_files
+    assert fdv.res_file_name in cache
+
+    raw_files_2, _, _ = filefinder.search_for_files(
+        fdv.run_name,
+        raw_file_dir=fdv.raw_data_dir,
+        cellpy_file_dir=fdv.output_dir,
+        cache=cache,
+    )
+    assert raw_files_2 == raw_files